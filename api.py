@@ -0,0 +1,229 @@
+# api.py
+# Bulk inventory import/export and paginated reorder decisions, for ERP syncs.
+#
+#   POST /api/inventory   upsert rows sent as application/json (an array of row
+#                         objects, parsed whole), application/x-ndjson or text/csv
+#                         (both parsed from the request stream in chunks). Every
+#                         row is validated once and the batch is written in one
+#                         transaction (any invalid row rejects the whole batch).
+#                         Re-sending a batch changes nothing. With If-Match: <version>
+#                         (the version a previous response returned) the batch is
+#                         only applied if nothing else changed the store since: 412.
+#   GET  /api/inventory   the stored inventory, a page at a time
+#   GET  /api/decisions   optimised reorder decisions, a page at a time
+#                         (?reorder_only=1 for just the products to reorder)
+#
+# Pages: ?offset=0&limit=1000 (up to MAX_PAGE_ROWS) and ?format=json|ndjson|csv.
+# Every page has an ETag and answers 304 to a matching If-None-Match, so
+# polling clients only download data that changed.
+# Auth: a logged-in session (admin for writes) or the API_KEY env value in the
+# X-API-Key header. Writes only accept non-form content types, which browsers
+# cannot send cross-site without a CORS preflight.
+import hmac
+import io
+import itertools
+import json
+import os
+from functools import wraps
+
+from flask import Blueprint, Response, abort, jsonify, request, session, url_for
+from werkzeug.exceptions import HTTPException
+
+from inventory_store import COLUMNS, VersionConflict
+from metrics import timed
+from utils import describe_products, inventory_store, inventory_version
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+API_KEY = os.getenv('API_KEY')
+DEFAULT_PAGE_ROWS = 1_000
+MAX_PAGE_ROWS = 10_000
+IMPORT_CHUNK_ROWS = 5_000
+STREAM_ROWS = 1_000     # rows serialised at a time in CSV/NDJSON responses
+FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+@api_bp.errorhandler(HTTPException)
+def _json_error(exc):
+    return jsonify(error=exc.description), exc.code
+
+
+def require_api_auth(write=False):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('X-API-Key')
+            if API_KEY and key and hmac.compare_digest(key.encode(), API_KEY.encode()):
+                return fn(*args, **kwargs)
+            if not session.get('logged_in'):
+                abort(401, 'log in or send X-API-Key')
+            if write and session.get('role') != 'admin':
+                abort(403, 'admin role required')
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ------------------ Import ------------------
+@api_bp.route('/inventory', methods=['POST'])
+@require_api_auth(write=True)
+def import_inventory():
+    from ingest import iter_inventory_chunks, validated_chunks
+    kind = request.mimetype
+    if kind not in FORMATS.values():
+        abort(415, f'send {", ".join(FORMATS.values())}')
+    expected = _expected_version()
+    if kind == 'text/csv':
+        frames = iter_inventory_chunks(request.stream, chunksize=IMPORT_CHUNK_ROWS,
+                                       with_reorder_point=False, numeric='float64')
+    else:
+        frames = validated_chunks(_record_frames(kind), with_reorder_point=False, numeric='float64')
+    try:
+        with timed('import', pipeline='api'):
+            received, changed = inventory_store.upsert_frames(_complete(frames), expected)
+    except VersionConflict as exc:
+        return jsonify(error=str(exc), version=exc.current), 412
+    except (ValueError, TypeError) as exc:
+        abort(400, str(exc))
+    return jsonify(received=received, changed=changed, version=inventory_store.version())
+
+
+def _expected_version():
+    value = request.headers.get('If-Match')
+    if value is None:
+        return None
+    try:
+        return int(value.strip().removeprefix('W/').strip('"'))
+    except ValueError:
+        abort(400, 'If-Match must be an inventory version number')
+
+
+def _record_frames(kind):
+    # JSON arrays are parsed whole; NDJSON is read and converted line by line
+    import pandas as pd
+    if kind == 'application/json':
+        records = json.load(request.stream)
+        if not isinstance(records, list):
+            raise ValueError('expected a JSON array of row objects')
+        rows = ((f'row {n}', r) for n, r in enumerate(records))
+    else:
+        # Buffered: line iteration on the raw request stream goes a few bytes at a time
+        rows = _ndjson_rows(io.BufferedReader(request.stream, 1 << 16))
+    while True:
+        batch = list(itertools.islice(rows, IMPORT_CHUNK_ROWS))
+        if not batch:
+            return
+        for where, r in batch:
+            if not isinstance(r, dict):
+                raise ValueError(f'{where}: expected a JSON object')
+        yield pd.DataFrame([r for _, r in batch])
+
+
+def _ndjson_rows(lines):
+    # (position, object) per non-blank line; errors name the line, counted from 1
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield f'line {n}', json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f'line {n}: {exc.msg} (column {exc.colno})') from None
+
+
+def _complete(frames):
+    # Upserts replace whole rows, so every column must be present
+    for df in frames:
+        missing = [c for c in COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f'missing column(s): {", ".join(missing)}')
+        yield df
+
+
+# ------------------ Export ------------------
+@api_bp.route('/inventory')
+@require_api_auth()
+def export_inventory():
+    offset, limit, fmt = _page_args()
+    etag = f'inventory-{inventory_version()}-{offset}-{limit}-{fmt}'
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    page, total = inventory_store.query_page(offset=offset, limit=limit)
+    return _page_response(page, total, offset, limit, fmt, etag)
+
+
+@api_bp.route('/decisions')
+@require_api_auth()
+def export_decisions():
+    from service import OUTPUT_COLUMNS, build_results, results_key
+    offset, limit, fmt = _page_args()
+    reorder_only = request.args.get('reorder_only') == '1'
+
+    def tag(key):
+        return f'decisions-{key[:32]}-{offset}-{limit}-{fmt}-{int(reorder_only)}'
+
+    # The key hashes the inputs, so a 304 is answered without touching the results
+    etag = tag(results_key())
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    df, key = build_results()
+    pending = bool(df.attrs.get('solve_pending'))
+    if not df.empty and reorder_only:
+        df = df[df['should_reorder'] == 1]
+    page = df.iloc[offset:offset + limit]
+    if not page.empty:
+        page = page.drop(columns=['product_name', 'description'], errors='ignore').merge(
+            describe_products(page['product_id'].tolist()), on='product_id', how='left')
+    page = page.reindex(columns=OUTPUT_COLUMNS)
+    # A stale answer while a solve runs must not be cached by the client
+    resp = _page_response(page, len(df), offset, limit, fmt, None if pending else tag(key),
+                          {'version': key, 'pending': pending})
+    if pending:
+        resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+def _page_args():
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(MAX_PAGE_ROWS, max(1, int(request.args.get('limit', DEFAULT_PAGE_ROWS))))
+    except ValueError:
+        abort(400, 'offset and limit must be integers')
+    fmt = request.args.get('format', 'json')
+    if fmt not in FORMATS:
+        abort(400, f'format must be one of {", ".join(FORMATS)}')
+    return offset, limit, fmt
+
+
+def _not_modified(etag):
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    return resp
+
+
+def _page_response(page, total, offset, limit, fmt, etag, meta=None):
+    next_offset = offset + limit if offset + limit < total else None
+    if fmt == 'json':
+        meta = {'total': total, 'offset': offset, 'limit': limit, 'next_offset': next_offset, **(meta or {})}
+        resp = Response('{"items": ' + page.to_json(orient='records') + ', ' + json.dumps(meta)[1:],
+                        mimetype=FORMATS[fmt])
+    else:
+        resp = Response(_stream(page, fmt), mimetype=FORMATS[fmt])
+    resp.headers['X-Total-Count'] = str(total)
+    if next_offset is not None:
+        args = {**request.args.to_dict(), 'offset': next_offset}
+        resp.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    if etag:
+        resp.set_etag(etag)
+    return resp
+
+
+def _stream(page, fmt):
+    if fmt == 'csv':
+        yield page.head(0).to_csv(index=False)
+    for start in range(0, len(page), STREAM_ROWS):
+        piece = page.iloc[start:start + STREAM_ROWS]
+        if fmt == 'csv':
+            yield piece.to_csv(index=False, header=False)
+        else:
+            yield piece.to_json(orient='records', lines=True)
@@ -2,61 +2,39 @@
 # Purpose: Simple Supply Chain Dashboard with Editable Inventory
 
 import os
-import pandas as pd
+
 from flask import Flask, render_template, redirect, url_for, session, request, flash
-from werkzeug.datastructures import MultiDict
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
-import plotly.express as px
-from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, FloatField, SubmitField, FormField
-from wtforms.fields import FieldList
-from wtforms.validators import DataRequired, NumberRange
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from utils import load_settings, save_settings, save_inventory_rows, inventory_store, VersionConflict
+from inventory_editor import (SAMPLE_ROW, page_args, load_page, form_data_for,
+                              submitted_rows, changed_rows, expected_versions)
+from forms import LoginForm, InventoryForm, SettingsForm
+from lazy import LazyDash
 
 # ------------------ Flask setup ------------------
 server = Flask(__name__, static_folder='static', static_url_path='/static')
-server.secret_key = 'supersecretkey'
+server.secret_key = os.getenv('SECRET_KEY', 'supersecretkey')
 
 # ------------------ Dash setup ------------------
-app = Dash(
-    __name__,
-    server=server,
-    url_base_pathname='/dashboard/',
-    assets_folder='static'
-)
-
-# ------------------ Forms ------------------
-class LoginForm(FlaskForm):
-    username = StringField('Username', validators=[DataRequired()])
-    password = PasswordField('Password', validators=[DataRequired()])
-    submit = SubmitField('Login')
-
-class InventoryItemForm(FlaskForm):
-    product_id = StringField('Product ID', render_kw={'readonly': True})
-    product_name = StringField('Product Name', validators=[DataRequired()])
-    item_description = StringField('Description', validators=[DataRequired()])
-    purpose = StringField('Purpose', validators=[DataRequired()])
-    stock = FloatField('Stock (000s)', validators=[DataRequired(), NumberRange(min=0)])
-    demand_rate = FloatField('Demand Rate (000s/day)', validators=[DataRequired(), NumberRange(min=0)])
-    lead_time = FloatField('Lead Time (days)', validators=[DataRequired(), NumberRange(min=0)])
-    reorder_cost = FloatField('Reorder Cost (000s USD)', validators=[DataRequired(), NumberRange(min=0)])
-    safety_stock = FloatField('Safety Stock (000s)', validators=[DataRequired(), NumberRange(min=0)])
-
-class InventoryForm(FlaskForm):
-    inventory = FieldList(FormField(InventoryItemForm), min_entries=0)
-    submit = SubmitField('Update Inventory')
-
-# ------------------ Data helpers ------------------
-DATA_PATH = 'data/input/inventory_data.csv'
-
-def load_data():
-    os.makedirs('data/input', exist_ok=True)
-    if not os.path.exists(DATA_PATH):
-        return pd.DataFrame(columns=[
-            'product_id', 'product_name', 'description', 'purpose',
-            'stock', 'demand_rate', 'lead_time', 'reorder_cost', 'safety_stock'
-        ])
-    return pd.read_csv(DATA_PATH)
+# Built on the first /dashboard/ request: pandas, Plotly and Dash stay unloaded until then
+def create_dash():
+    import pandas as pd
+    from dash import Dash
+    # Lets utils.load_data hand out cheap copies of the cached inventory
+    pd.set_option('mode.copy_on_write', True)
+    dash = Dash(
+        __name__,
+        requests_pathname_prefix='/dashboard/',
+        routes_pathname_prefix='/',
+        assets_folder='static'
+    )
+    dash.layout = dashboard_layout
+    return dash
+
+app = LazyDash(create_dash)
+server.wsgi_app = DispatcherMiddleware(server.wsgi_app, {'/dashboard': app})
+# Served by the Dash app above; the rule only lets templates link to it
+server.add_url_rule('/dashboard/', 'dashboard', build_only=True)
 
 # ------------------ Routes ------------------
 @server.route('/')
@@ -85,71 +63,63 @@ def edit_inventory():
         flash("Please log in to edit inventory.", "warning")
         return redirect(url_for('login'))
 
-    df = load_data()
-    form_data = MultiDict()
-
-    # Pre-fill form with existing data
-    if not df.empty:
-        for idx, row in df.iterrows():
-            form_data.add(f'inventory-{idx}-product_id', str(row.get('product_id', '')))
-            form_data.add(f'inventory-{idx}-product_name', str(row.get('product_name', '')))
-            form_data.add(f'inventory-{idx}-item_description', str(row.get('description', '')))
-            form_data.add(f'inventory-{idx}-purpose', str(row.get('purpose', '')))
-            form_data.add(f'inventory-{idx}-stock', str(row.get('stock', 0)))
-            form_data.add(f'inventory-{idx}-demand_rate', str(row.get('demand_rate', 0)))
-            form_data.add(f'inventory-{idx}-lead_time', str(row.get('lead_time', 0)))
-            form_data.add(f'inventory-{idx}-reorder_cost', str(row.get('reorder_cost', 0)))
-            form_data.add(f'inventory-{idx}-safety_stock', str(row.get('safety_stock', 0)))
-    else:
-        # Add one blank sample entry
-        form_data.add('inventory-0-product_id', 'P001')
-        form_data.add('inventory-0-product_name', 'Sample Widget')
-        form_data.add('inventory-0-item_description', 'Example item')
-        form_data.add('inventory-0-purpose', 'Demo')
-        form_data.add('inventory-0-stock', '100')
-        form_data.add('inventory-0-demand_rate', '10')
-        form_data.add('inventory-0-lead_time', '5')
-        form_data.add('inventory-0-reorder_cost', '50')
-        form_data.add('inventory-0-safety_stock', '20')
-
-    form = InventoryForm(formdata=form_data)
+    # One page of the catalog at a time; filtering/sorting run in the store
+    args = page_args(request.args)
+    page, total, pages = load_page(inventory_store, args)
+    rows = page.to_dict('records')
+    if not rows and not args['q']:
+        rows = [SAMPLE_ROW]  # one blank sample entry for an empty catalog
 
-    if request.method == 'POST' and form.validate_on_submit():
-        updated_data = []
-        for sub in form.inventory:
-            updated_data.append({
-                'product_id': sub.product_id.data,
-                'product_name': sub.product_name.data,
-                'description': sub.item_description.data,  # map to CSV field
-                'purpose': sub.purpose.data,
-                'stock': sub.stock.data,
-                'demand_rate': sub.demand_rate.data,
-                'lead_time': sub.lead_time.data,
-                'reorder_cost': sub.reorder_cost.data,
-                'safety_stock': sub.safety_stock.data,
-            })
-
-        pd.DataFrame(updated_data).to_csv(DATA_PATH, index=False)
-        flash("Inventory updated successfully!", "success")
-        return redirect(url_for('edit_inventory'))
-
-    return render_template('edit_inventory.html', form=form)
+    form = InventoryForm(formdata=request.form if request.method == 'POST' else form_data_for(rows))
 
-# ------------------ Dash dashboard ------------------
-df = load_data()
-if df.empty:
-    df = pd.DataFrame({'product_id': [], 'stock': [], 'reorder_cost': []})
+    if request.method == 'POST' and form.validate_on_submit():
+        # Only rows edited on this page are posted; upsert the ones that really differ
+        submitted = submitted_rows(form)
+        current = inventory_store.get_rows(r['product_id'] for r in submitted)
+        try:
+            save_inventory_rows(changed_rows(submitted, current), expected_versions(form))
+            flash("Inventory updated successfully!", "success")
+        except VersionConflict as exc:
+            flash(f"Not saved: {', '.join(exc.product_ids[:10])} changed since you loaded the page.", "danger")
+        return redirect(url_for('edit_inventory', **request.args.to_dict()))
+
+    return render_template('edit_inventory.html', form=form, args=args, total=total, pages=pages)
+
+@server.route('/settings', methods=['GET', 'POST'])
+def settings():
+    if not session.get('logged_in'):
+        flash("Please log in to edit settings.", "warning")
+        return redirect(url_for('login'))
 
-fig_stock = px.bar(df, x='product_id', y='stock', title="Inventory Stock Levels")
-fig_cost = px.bar(df, x='product_id', y='reorder_cost', title="Reorder Costs")
+    cur = load_settings()
+    form = SettingsForm(data=cur)
+    if form.validate_on_submit():
+        cur.update({'budget': form.budget.data,
+                    'warehouse_capacity': form.warehouse_capacity.data})
+        try:
+            save_settings(cur, expected_version=form.version.data or None)
+            flash("Settings updated!", "success")
+        except (VersionConflict, ValueError):
+            flash("Not saved: the settings were changed since you loaded the page.", "danger")
+        return redirect(url_for('settings'))
+    return render_template('settings.html', form=form)
 
-app.layout = html.Div([
-    html.H1("Supply Chain Dashboard"),
-    dcc.Graph(id='stock-graph', figure=fig_stock),
-    dcc.Graph(id='cost-graph', figure=fig_cost),
-    html.A("Edit Inventory", href="/edit_inventory")
-])
+# ------------------ Dash dashboard ------------------
+def dashboard_layout():
+    # Evaluated per page load, so the charts follow inventory and settings edits;
+    # the figures come from the shared service cache
+    from dash import dcc, html
+    from service import build_figures
+    fig_stock, fig_cost, _ = build_figures(view='auto')
+
+    return html.Div([
+        html.H1("Supply Chain Dashboard"),
+        dcc.Graph(id='stock-graph', figure=fig_stock),
+        dcc.Graph(id='cost-graph', figure=fig_cost),
+        html.A("Edit Inventory", href="/edit_inventory")
+    ])
 
 # ------------------ Run app ------------------
 if __name__ == '__main__':
-    server.run(debug=True, port=8050, use_reloader=False)
+    # Development server; production: gunicorn wsgi:editor, see wsgi.py
+    server.run(debug=os.getenv('DEBUG', '1') == '1', port=int(os.getenv('PORT', '8050')), use_reloader=False)
@@ -0,0 +1,70 @@
+# atomicfile.py
+# Whole-file writes that readers see either before or after, never half done:
+# the new content goes to a temporary file in the same directory, which then
+# replaces the target with one rename. Optional cross-process lock for
+# read-modify-write cycles (compare-and-swap on a version number).
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: file_lock only serialises threads of this process
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_lock = threading.Lock()
+
+# Read once at import: os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _target_mode(path):
+    # Keep an existing file's mode; new files get the usual 0666 & ~umask
+    # (mkstemp alone would leave them 0600)
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    # with atomic_write(path) as f: f.write(...)  -- replaces path on success only
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        os.chmod(tmp, _target_mode(path))
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    # Exclusive lock on path + '.lock', held for the block. Readers never take it:
+    # atomic_write already gives them a consistent file.
+    with _thread_locks_lock:
+        lock = _thread_locks.setdefault(path, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(f'{path}.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,96 @@
+# Measures cold start: each case runs in a fresh interpreter that imports the
+# server module and times its first requests, recording which heavy packages
+# had been loaded by then.
+#
+# Run:
+#   python benchmarks/bench_cold_start.py
+#   python benchmarks/bench_cold_start.py --repeat 5 --compare benchmarks/results/<older>.json
+# Results go to benchmarks/results/cold_start-<commit>-<timestamp>.json.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+HEAVY = ['numpy', 'pandas', 'plotly', 'dash', 'pulp', 'kaleido']
+
+# Requests made in order after the import; the session is logged in as admin
+PATHS = ['/login', '/settings', '/api/version', '/edit_inventory', '/dashboard', '/dash/_dash-layout']
+
+_CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import supply_chain_dashboard as d
+out = {'import': time.perf_counter() - start, 'requests': {}, 'loaded': {}}
+client = d.server.test_client()
+with client.session_transaction() as s:
+    s['logged_in'] = True
+    s['role'] = 'admin'
+for path in PATHS:
+    t = time.perf_counter()
+    status = client.get(path).status_code
+    out['requests'][path] = {'seconds': time.perf_counter() - t, 'status': status}
+    out['loaded'][path] = [m for m in HEAVY if m in sys.modules]
+out['total'] = time.perf_counter() - start
+print(json.dumps(out))
+'''
+
+
+def run_once(env=None):
+    code = f'PATHS = {PATHS!r}\nHEAVY = {HEAVY!r}\n' + _CHILD
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})}, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarise(runs):
+    # Median over runs, per stage
+    median = lambda values: round(statistics.median(values), 6)
+    return {
+        'import': median([r['import'] for r in runs]),
+        'requests': {p: median([r['requests'][p]['seconds'] for r in runs]) for p in PATHS},
+        'status': {p: runs[0]['requests'][p]['status'] for p in PATHS},
+        'loaded_after': runs[0]['loaded'],
+        'total': median([r['total'] for r in runs]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure server cold-start time.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default=None, help='JSON output path')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='earlier results to compare with')
+    args = parser.parse_args(argv)
+
+    result = summarise([run_once() for _ in range(args.repeat)])
+    print(f"{'import':<22} {result['import']:.3f}s")
+    for path in PATHS:
+        loaded = ','.join(result['loaded_after'][path]) or '-'
+        print(f"{path:<22} {result['requests'][path]:.3f}s  [{result['status'][path]}]  loaded: {loaded}")
+    print(f"{'total':<22} {result['total']:.3f}s")
+
+    sys.path.insert(0, os.path.dirname(__file__))
+    from bench_pipeline import environment
+    report = {'benchmark': 'cold_start', 'created': datetime.now().isoformat(timespec='seconds'),
+              'environment': environment(), 'repeat': args.repeat, 'result': result}
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"cold_start-{report['environment']['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nwrote {out}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)['result']
+        print(f"\nimport {before['import']:.3f}s -> {result['import']:.3f}s, "
+              f"first /login {before['requests']['/login']:.3f}s -> {result['requests']['/login']:.3f}s, "
+              f"total {before['total']:.3f}s -> {result['total']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# Times PuLP model construction for growing catalogs.
+# Run: python benchmarks/bench_model_build.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from optimizer import build_reorder_model
+from synthetic import make_catalog
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def time_build(n, seed=0):
+    df = make_catalog(n, seed)
+    cost = df['reorder_cost'].to_numpy()
+    stock = df['stock'].to_numpy()
+    reorder_point = (df['demand_rate'] * df['lead_time'] + df['safety_stock']).to_numpy()
+    start = time.perf_counter()
+    build_reorder_model(cost, stock, reorder_point, budget=cost.sum(), capacity=50 * n)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'products':>10} {'build (s)':>10} {'us/product':>11}")
+    for n in SIZES:
+        elapsed = time_build(n)
+        print(f"{n:>10} {elapsed:>10.3f} {elapsed / n * 1e6:>11.2f}")
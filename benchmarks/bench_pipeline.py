@@ -0,0 +1,161 @@
+# Times each stage of the optimise/plot pipeline on synthetic catalogs and
+# writes the timings as JSON, so runs can be compared between commits.
+#
+# Run:
+#   python benchmarks/bench_pipeline.py                        # 100 .. 1M products
+#   python benchmarks/bench_pipeline.py --sizes 1000,10000 --max-model 10000
+#   python benchmarks/bench_pipeline.py --compare benchmarks/results/<older>.json
+# Results go to benchmarks/results/pipeline-<commit>-<timestamp>.json.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from figures import detail_figures, view_figures
+from forecast import apply_forecast, fit
+from ingest import add_reorder_point, read_inventory
+from optimizer import UNITS_PER_ORDER, build_reorder_model, closed_form_reorders, solve_reorder_model
+from snapshots import write_snapshot
+from synthetic import make_demand_history, write_catalog
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+MAX_MODEL = 100_000     # PuLP/CBC and forecast stages are skipped above this many products
+HISTORY_DAYS = 90       # daily demand history per product for the forecast stage
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+STAGES = ['load', 'forecast', 'reorder_point', 'closed_form', 'model_build', 'solve',
+          'figures', 'png_export', 'csv_write', 'snapshot_write']
+
+
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 6)
+
+
+def run_size(n, workdir, max_model=MAX_MODEL, png=True, seed=0):
+    path = os.path.join(workdir, f'catalog_{n}.csv')
+    write_catalog(n, path, seed)
+    timings = {}
+
+    with stage(timings, 'load'):
+        df = read_inventory(path, with_reorder_point=False)
+    if n <= max_model:
+        history = make_demand_history(df, HISTORY_DAYS, seed)
+        history['day'] = history.pop('date').to_numpy(dtype='datetime64[D]').astype(np.int64)
+        with stage(timings, 'forecast'):
+            df = apply_forecast(df, fit(history))
+    with stage(timings, 'reorder_point'):
+        df = add_reorder_point(df)
+
+    cost = df['reorder_cost'].to_numpy(dtype=float)
+    stock = df['stock'].to_numpy(dtype=float)
+    reorder_point = df['reorder_point'].to_numpy(dtype=float)
+    # Limits with headroom over the forced set, so every size is feasible
+    forced = reorder_point > stock
+    budget = float(cost[forced].sum()) * 1.1 + 1
+    capacity = UNITS_PER_ORDER * int(forced.sum()) * 1.1 + 1
+
+    with stage(timings, 'closed_form'):
+        result = closed_form_reorders(cost, stock, reorder_point, budget, capacity, big_m=1_000_000,
+                                      force_skip_above=False)
+    decisions = result.decisions
+    if n <= max_model:
+        with stage(timings, 'model_build'):
+            prob, reorder = build_reorder_model(cost, stock, reorder_point, budget, capacity,
+                                                big_m=1_000_000, force_skip_above=False)
+        with stage(timings, 'solve'):
+            decisions, _ = solve_reorder_model(prob, reorder)
+    df['should_reorder'] = decisions
+
+    with stage(timings, 'figures'):
+        fig1, fig2, view = view_figures(df, view='auto')
+    if png:
+        detail1, detail2 = detail_figures(df)
+        with stage(timings, 'png_export'):
+            detail1.write_image(os.path.join(workdir, 'inventory_dashboard.png'))
+            detail2.write_image(os.path.join(workdir, 'cost-to-reorder.png'))
+    with stage(timings, 'csv_write'):
+        df.to_csv(os.path.join(workdir, 'inventory_dashboard.csv'), index=False)
+    with stage(timings, 'snapshot_write'):
+        write_snapshot(df, directory=os.path.join(workdir, 'snapshots'))
+
+    return {'products': n, 'view': view, 'reorders': int(np.sum(decisions)), 'seconds': timings}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+    return {'commit': commit, 'python': platform.python_version(), 'pandas': pd.__version__,
+            'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {r['products']: r['seconds'] for r in baseline['results']}
+    print(f"\nvs {baseline['environment']['commit']} (ratio new/old, >1 is slower)")
+    for row in current['results']:
+        old = before.get(row['products'])
+        if old is None:
+            continue
+        ratios = {s: row['seconds'][s] / old[s] for s in STAGES
+                  if s in row['seconds'] and old.get(s)}
+        print(f"{row['products']:>9} " + ' '.join(f'{s}={r:.2f}' for s, r in ratios.items()))
+
+
+def print_header():
+    print(f"{'products':>9} " + ' '.join(f'{s:>14}' for s in STAGES))
+
+
+def print_row(row):
+    cells = [f"{row['seconds'][s]:>14.4f}" if s in row['seconds'] else f"{'-':>14}" for s in STAGES]
+    print(f"{row['products']:>9} " + ' '.join(cells), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the optimise/plot pipeline.')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    parser.add_argument('--max-model', type=int, default=MAX_MODEL,
+                        help='largest catalog for the PuLP build/solve stages')
+    parser.add_argument('--no-png', action='store_true', help='skip the kaleido PNG export stage')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='JSON output path')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='earlier results to compare with')
+    args = parser.parse_args(argv)
+
+    results = []
+    print_header()
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in (int(s) for s in args.sizes.split(',')):
+            results.append(run_size(n, workdir, args.max_model, not args.no_png, args.seed))
+            print_row(results[-1])
+
+    report = {'benchmark': 'pipeline', 'created': datetime.now().isoformat(timespec='seconds'),
+              'environment': environment(), 'max_model': args.max_model, 'results': results}
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"pipeline-{report['environment']['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nwrote {out}')
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
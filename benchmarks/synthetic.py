@@ -0,0 +1,84 @@
+# Synthetic inventory catalogs with the same columns as data/input/inventory_data.csv,
+# and daily demand histories for them (see forecast.py).
+# Run: python benchmarks/synthetic.py 100000 data/input/synthetic_100k.csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from inventory_store import COLUMNS
+
+PURPOSES = [
+    'AI training', 'Cloud infrastructure', 'Data center computing', 'Data center power',
+    'Data center setup', 'Data transfer', 'Device compatibility', 'Embedded systems',
+    'Enterprise computing', 'High-speed storage', 'IoT devices', 'Network connectivity',
+    'Network expansion', 'Portable devices', 'Robotics automation', 'Server maintenance',
+    'Server memory', 'Smart buildings', 'Smart cities', 'Storage solutions',
+]
+KINDS = ['AI Chip', 'Sensor Module', 'GPU Unit', 'Memory Stick', 'SSD Drive', 'Network Card',
+         'Power Supply', 'Cooling Fan', 'Motherboard', 'Cable Kit', 'Router', 'Switch']
+ADJECTIVES = ['High-performance', 'Precision', 'Low-power', 'Rugged', 'Compact', 'Enterprise-grade']
+
+
+def make_catalog(n, seed=0, below_reorder_share=0.3):
+    # Skewed like a real catalog: a few purposes hold most products, demand and
+    # cost are log-normal, lead times cluster around a week, and roughly
+    # below_reorder_share of the products sit under their reorder point.
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(PURPOSES) + 1)
+    purpose = rng.choice(len(PURPOSES), n, p=weights / weights.sum())
+    kind = rng.integers(0, len(KINDS), n)
+
+    demand = np.round(rng.lognormal(mean=2.0, sigma=0.6, size=n), 1)
+    lead_time = np.clip(np.round(rng.gamma(shape=4.0, scale=1.5, size=n)), 1, 30)
+    safety = np.round(demand * rng.uniform(0.5, 2.0, n), 1)
+    reorder_point = demand * lead_time + safety
+    below = rng.random(n) < below_reorder_share
+    stock = np.where(below,
+                     reorder_point * rng.uniform(0.0, 0.95, n),
+                     reorder_point * rng.uniform(1.05, 3.0, n))
+
+    ids = np.char.add('P', np.arange(1, n + 1).astype(str))
+    return pd.DataFrame({
+        'product_id': ids,
+        'product_name': np.char.add(np.array(KINDS)[kind], np.char.add(' ', ids)),
+        'description': pd.Categorical.from_codes(
+            rng.integers(0, len(ADJECTIVES), n) * len(KINDS) + kind,
+            [f'{a} {k.lower()}' for a in ADJECTIVES for k in KINDS]),
+        'purpose': pd.Categorical.from_codes(purpose, PURPOSES),
+        'stock': np.round(stock, 1),
+        'demand_rate': demand,
+        'lead_time': lead_time,
+        'reorder_cost': np.round(rng.lognormal(mean=4.5, sigma=0.4, size=n), 2),
+        'safety_stock': safety,
+    }, columns=COLUMNS)
+
+
+def make_demand_history(catalog, days=90, seed=0, end='2026-01-01'):
+    # Daily demand rows (product_id, date, quantity) around each product's demand_rate;
+    # about a fifth of product-days have no sale and are left out, as in a real feed
+    rng = np.random.default_rng(seed)
+    n = len(catalog)
+    rate = catalog['demand_rate'].to_numpy(dtype=float)
+    qty = rng.poisson(np.tile(rate, days)).astype(float)
+    keep = (rng.random(n * days) > 0.2) & (qty > 0)
+    dates = np.repeat(np.arange(np.datetime64(end) - days + 1, np.datetime64(end) + 1), n)
+    return pd.DataFrame({'product_id': np.tile(catalog['product_id'].to_numpy(), days)[keep],
+                         'date': dates[keep], 'quantity': qty[keep]})
+
+
+def write_catalog(n, path, seed=0):
+    df = make_catalog(n, seed)
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return df
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python benchmarks/synthetic.py N PATH(.csv|.parquet)')
+    write_catalog(int(sys.argv[1]), sys.argv[2])
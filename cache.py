@@ -0,0 +1,176 @@
+# cache.py
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+from atomicfile import atomic_write, file_lock
+
+
+def content_key(*paths, token=''):
+    # Hash of the raw bytes of every input file plus an optional version token;
+    # a missing file hashes as empty
+    h = hashlib.sha256(token.encode())
+    for path in paths:
+        h.update(path.encode())
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU of optimisation results, optionally persisted with pickle."""
+
+    def __init__(self, maxsize=16, persist_path=None):
+        self.maxsize = maxsize
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_path and os.path.exists(persist_path):
+            try:
+                with open(persist_path, 'rb') as f:
+                    self._items.update(pickle.load(f))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._items.clear()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+            if self.persist_path:
+                self._persist()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            if self.persist_path:
+                self._persist()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _persist(self):
+        with atomic_write(self.persist_path, 'wb') as f:
+            pickle.dump(self._items, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def stat_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class StatCache:
+    """Process-level cache of parsed files, revalidated with one os.stat per file."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, paths, loader, refresh=None, token=None):
+        # The signature is taken before loading: if the file changes mid-load the
+        # next call sees a new signature and reloads.
+        # refresh(old value) -> new value, if given, replaces loader() for a stale entry.
+        # token: a version number compared along with the files, for sources whose
+        # changes do not show in a stat (a SQLite database in WAL mode)
+        signature = tuple(stat_signature(p) for p in paths) + (token,)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader() if entry is None or refresh is None else refresh(entry[1])
+        with self._lock:
+            self._entries[key] = (signature, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+class SharedCache:
+    """Results shared between worker processes: pickled values in SQLite, plus a
+    per-key file lock so only one process computes a missing key."""
+
+    def __init__(self, path, maxsize=64, table='entries'):
+        # table: caches sharing one file keep separate tables, each bounded by its own maxsize
+        self.path = path
+        self.maxsize = maxsize
+        self.table = table
+        self.lock_dir = f'{path}.locks'
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.lock_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                         "(key TEXT PRIMARY KEY, value BLOB, created REAL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # Readers never wait for the writer
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (self._name(key),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                         (self._name(key), blob, time.time()))
+            conn.execute(f"DELETE FROM {self.table} WHERE key NOT IN "
+                         f"(SELECT key FROM {self.table} ORDER BY created DESC LIMIT ?)", (self.maxsize,))
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    @contextmanager
+    def lock(self, key):
+        # Held while key is computed; released by the OS if the process dies.
+        # Keys share 256 lock files, so the directory stays bounded. Without
+        # fcntl (Windows) file_lock still serialises the threads of this process.
+        with file_lock(os.path.join(self.lock_dir, self._name(key)[:2])):
+            yield
@@ -0,0 +1,92 @@
+# --------------------------------------------------------------
+# dashboard_app.py
+# Dash charts for the dashboard, drawn from service.py. Imported on the first
+# /dash/ request (or by PREWARM), so the Flask pages never pay for pandas,
+# Plotly, Dash or PuLP.
+# --------------------------------------------------------------
+import os
+import pandas as pd
+from dash import Dash, dcc, html, Input, Output, State, ctx, no_update
+from utils import data_version
+from figures import GROUP_COLUMNS
+from service import build_figures
+
+# Lets utils.load_data hand out cheap copies of the cached inventory
+pd.set_option('mode.copy_on_write', True)
+
+# How often open dashboards check whether inventory/settings changed
+VERSION_POLL_MS = int(os.getenv('VERSION_POLL_MS', '3000'))
+
+# Dash layout (same for admin & user)
+def layout():
+    return html.Div([
+        html.H2('Supply-Chain Overview', style={'textAlign':'center'}),
+        html.Div([
+            dcc.RadioItems(id='view-mode', value='auto', inline=True,
+                           options=[{'label': 'Auto', 'value': 'auto'},
+                                    {'label': 'Summary', 'value': 'summary'},
+                                    {'label': 'All products', 'value': 'detail'}]),
+            dcc.Dropdown(id='group-by', value='purpose', clearable=False,
+                         options=[{'label': label, 'value': col} for col, label in GROUP_COLUMNS.items()],
+                         style={'width': '200px'}),
+            html.Button('Back to summary', id='drill-reset'),
+        ], style={'display': 'flex', 'gap': '1em', 'alignItems': 'center'}),
+        dcc.Graph(id='graph-stock'),
+        dcc.Graph(id='graph-cost'),
+        dcc.Store(id='drill'),
+        dcc.Store(id='view-state'),
+        dcc.Store(id='data-version'),
+        # Cheap version check; the full pipeline only reruns when the version changes
+        dcc.Interval(id='version-poll', interval=VERSION_POLL_MS, n_intervals=0)
+    ])
+
+def check_version(n, current, view_state):
+    version = data_version()
+    # Figures built from a stale solve keep polling until the fresh result lands
+    if view_state and view_state.get('pending'):
+        return f'{version}#{n}'
+    return no_update if version == current else version
+
+def update_drill(click, _reset, _mode, _group_by, view):
+    # Clicking a category bar in the summary drills into it; anything else resets
+    if ctx.triggered_id != 'graph-stock':
+        return None
+    if not view or view['view'] != 'summary' or not click or click['points'][0].get('curveNumber', 0) != 0:
+        return no_update
+    return click['points'][0]['x']
+
+def refresh_graphs(_, view, group_by, drill):
+    f1, f2, df = build_figures(view, group_by, drill)
+    return f1, f2, {'view': df.attrs.get('view'), 'pending': bool(df.attrs.get('solve_pending'))}
+
+
+# ------------------ App factory ------------------
+def create_dash_app(**kwargs):
+    # kwargs go to Dash, e.g. requests_pathname_prefix when mounted under /dash/
+    app = Dash(__name__, assets_folder='static', **kwargs)
+    app.layout = layout
+    app.callback(
+        Output('data-version', 'data'),
+        Input('version-poll', 'n_intervals'),
+        [State('data-version', 'data'),
+         State('view-state', 'data')]
+    )(check_version)
+    app.callback(
+        Output('drill', 'data'),
+        [Input('graph-stock', 'clickData'),
+         Input('drill-reset', 'n_clicks'),
+         Input('view-mode', 'value'),
+         Input('group-by', 'value')],
+        State('view-state', 'data'),
+        prevent_initial_call=True
+    )(update_drill)
+    app.callback(
+        [Output('graph-stock', 'figure'),
+         Output('graph-cost', 'figure'),
+         Output('view-state', 'data')],
+        [Input('data-version', 'data'),
+         Input('view-mode', 'value'),
+         Input('group-by', 'value'),
+         Input('drill', 'data')]
+    )(refresh_graphs)
+    return app
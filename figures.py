@@ -0,0 +1,115 @@
+# figures.py
+# Dashboard figures. Summary views keep the payload bounded by the view size,
+# not the catalog size.
+import plotly.express as px
+
+MAX_DETAIL_BARS = 200   # per-product bars sent to the browser at most
+MAX_GROUPS = 50         # category bars in the summary view at most
+TOP_N = 20              # urgent items listed in the summary view
+
+# Columns that can be used to aggregate the summary view, with labels
+GROUP_COLUMNS = {'purpose': 'Purpose'}
+
+
+def with_gap(df):
+    # Positive gap = stock below the reorder point
+    return df.assign(reorder_gap=df['reorder_point'] - df['stock'])
+
+
+def most_urgent(df, n):
+    return with_gap(df).nlargest(n, 'reorder_gap')
+
+
+def detail_figures(df, max_bars=MAX_DETAIL_BARS, subtitle='', describe=None):
+    # describe(product_ids) -> frame with product_name/description, when df was
+    # loaded without its text columns
+    total = len(df)
+    if total > max_bars:
+        df = most_urgent(df, max_bars)
+        subtitle += f' ({max_bars} most urgent of {total})'
+    if describe is not None and 'product_name' not in df.columns:
+        df = df.merge(describe(df['product_id'].tolist()), on='product_id', how='left')
+
+    fig1 = px.bar(df, x='product_id', y='stock',
+                  color='should_reorder',
+                  title=f'Stock Levels (red = reorder recommended){subtitle}',
+                  color_continuous_scale='Viridis')
+    fig1.add_hline(y=df['reorder_point'].mean(),
+                   line_dash="dash", line_color="red",
+                   annotation_text="Avg Reorder Point")
+
+    fig1.update_traces(
+        hovertemplate=(
+            '<b>%{x}</b><br>'
+            'Name: %{customdata[0]}<br>'
+            'Desc: %{customdata[1]}<br>'
+            'Purpose: %{customdata[2]}<br>'
+            'Stock: %{y}k<br>'
+            'Demand: %{customdata[3]}k/day<br>'
+            'Lead: %{customdata[4]} days<br>'
+            'Safety: %{customdata[5]}k'
+        ),
+        customdata=df[['product_name','description','purpose',
+                       'demand_rate','lead_time','safety_stock']]
+    )
+
+    fig2 = px.bar(df, x='product_id', y='reorder_cost',
+                  title=f'Reorder Cost per Product{subtitle}',
+                  color='should_reorder',
+                  color_continuous_scale='Plasma')
+    return fig1, fig2
+
+
+def summary_figures(df, group_by='purpose', top_n=TOP_N, max_groups=MAX_GROUPS, describe=None):
+    label = GROUP_COLUMNS.get(group_by, group_by)
+    agg = (df.assign(order_cost=df['reorder_cost'] * df['should_reorder'])
+             .groupby(group_by, observed=True, sort=False)
+             .agg(products=('product_id', 'size'),
+                  stock=('stock', 'sum'),
+                  reorder_point=('reorder_point', 'sum'),
+                  reorders=('should_reorder', 'sum'),
+                  order_cost=('order_cost', 'sum'))
+             .reset_index())
+    title = f'Stock by {label} (click a bar to drill down)'
+    if len(agg) > max_groups:
+        title += f' - top {max_groups} of {len(agg)}'
+    agg = agg.sort_values(['reorders', 'products'], ascending=False).head(max_groups)
+
+    fig1 = px.bar(agg, x=group_by, y='stock', color='reorders', title=title,
+                  color_continuous_scale='Viridis',
+                  custom_data=['products', 'reorder_point', 'reorders', 'order_cost'])
+    fig1.update_traces(hovertemplate=(
+        '<b>%{x}</b><br>'
+        'Products: %{customdata[0]}<br>'
+        'Stock: %{y}k<br>'
+        'Reorder point: %{customdata[1]}k<br>'
+        'Reorders: %{customdata[2]}<br>'
+        'Order cost: %{customdata[3]}k USD'
+    ))
+    fig1.add_scatter(x=agg[group_by], y=agg['reorder_point'], mode='markers',
+                     marker=dict(color='red', symbol='line-ew-open', size=18),
+                     name='Reorder point', hoverinfo='skip')
+
+    top = most_urgent(df, top_n)
+    if describe is not None and 'product_name' not in top.columns:
+        top = top.merge(describe(top['product_id'].tolist()), on='product_id', how='left')
+    fig2 = px.bar(top, x='product_id', y='reorder_gap', color='should_reorder',
+                  title=f'Top {len(top)} Urgent Items by Reorder Gap',
+                  color_continuous_scale='Plasma',
+                  hover_data=[c for c in ('product_name', group_by, 'stock', 'reorder_point', 'reorder_cost')
+                              if c in top.columns])
+    return fig1, fig2
+
+
+def view_figures(df, view='auto', group_by='purpose', drill=None, describe=None):
+    # Returns (fig1, fig2, resolved view); drill selects one group of the summary
+    if group_by not in df.columns:
+        group_by = 'purpose'
+    if drill is not None:
+        subset = df[df[group_by].astype(str) == str(drill)]
+        return (*detail_figures(subset, subtitle=f' - {drill}', describe=describe), 'drill')
+    if view == 'auto':
+        view = 'detail' if len(df) <= MAX_DETAIL_BARS else 'summary'
+    if view == 'summary':
+        return (*summary_figures(df, group_by, describe=describe), 'summary')
+    return (*detail_figures(df, describe=describe), 'detail')
@@ -0,0 +1,219 @@
+# forecast.py
+# Demand forecasting from daily history: rolling mean/variance, exponential
+# smoothing and service-level safety stock, computed for every product at once.
+#
+# History is a CSV (or Parquet) of product_id,date,quantity rows; days without
+# a row count as zero demand. Appending new days to the CSV advances the kept
+# state by those days only (see extend_history); anything else refits.
+#
+# Run: python forecast.py [history.csv] [--service-level 0.95] [--out forecast.csv]
+# prints the forecast inputs the optimiser would use for the current inventory.
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+FORECAST_WINDOW = int(os.getenv('FORECAST_WINDOW', '28'))    # days in the rolling mean/variance
+SMOOTHING_ALPHA = float(os.getenv('SMOOTHING_ALPHA', '0.3'))
+SERVICE_LEVEL = float(os.getenv('SERVICE_LEVEL', '0.95'))
+MIN_HISTORY_DAYS = int(os.getenv('MIN_HISTORY_DAYS', '7'))   # shorter histories keep the typed values
+
+HISTORY_COLUMNS = ['product_id', 'date', 'quantity']
+_EPOCH = np.datetime64('1970-01-01', 'D')
+_TAIL_CHECK = 64   # bytes before the read offset that must be unchanged to extend
+
+
+# ---- reading ----
+def _typed(df, offset=0):
+    # -> product_id, day (int days since epoch), quantity; raises ValueError on bad rows
+    missing = set(HISTORY_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f'missing column(s): {", ".join(sorted(missing))}')
+    day = _days(df['date'])
+    qty = pd.to_numeric(df['quantity'], errors='coerce').to_numpy(dtype=float)
+    bad = df['product_id'].isna().to_numpy() | np.isnat(day) | np.isnan(qty) | (qty < 0)
+    if bad.any():
+        rows = (np.flatnonzero(bad)[:5] + offset).tolist()
+        raise ValueError(f'{int(bad.sum())} invalid history row(s) (missing id/date, or missing/negative '
+                         f'quantity), e.g. rows {rows}')
+    ids = df['product_id']
+    return pd.DataFrame({'product_id': ids if ids.dtype == 'category' else ids.astype(str),
+                         'day': (day - _EPOCH).astype(np.int64), 'quantity': qty})
+
+
+def _days(dates):
+    # The same few hundred dates repeat for every product: parse each distinct one once
+    if dates.dtype == 'category':
+        codes, uniques = dates.cat.codes.to_numpy(), dates.cat.categories
+    else:
+        codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(uniques, errors='coerce', format='ISO8601').to_numpy(dtype='datetime64[D]')
+    return np.where(codes >= 0, parsed[codes], np.datetime64('NaT'))
+
+
+def read_history(path):
+    if path.lower().endswith(('.parquet', '.pq')):
+        return _typed(pd.read_parquet(path, columns=HISTORY_COLUMNS))
+    try:
+        import pyarrow  # noqa: F401  multi-threaded parse, ids and dates dictionary-encoded
+        options = {'engine': 'pyarrow', 'dtype': {'product_id': 'category', 'date': 'category'}}
+    except ImportError:
+        options = {'dtype': {'product_id': str}}
+    return _typed(pd.read_csv(path, usecols=HISTORY_COLUMNS, **options))
+
+
+# ---- state ----
+class DemandState:
+    """Per-product demand statistics up to and including `day`.
+
+    window holds the last FORECAST_WINDOW days, column day % w; the smoothed
+    level is num / den (pandas ewm(adjust=True) from each product's first day).
+    """
+
+    def __init__(self, product_ids, day, first_day, window, num, den, alpha, source=None):
+        self.product_ids = product_ids
+        self.day = day
+        self.first_day = first_day
+        self.window = window
+        self.num = num
+        self.den = den
+        self.alpha = alpha
+        self.source = source    # (path, byte offset, bytes before offset) for CSV appends
+
+    def advance(self, daily):
+        # daily: (days, products) array for day + 1 ..; returns a new state
+        w = self.window.shape[1]
+        decay = 1 - self.alpha
+        window, num, den = self.window.copy(), self.num.copy(), self.den.copy()
+        day = self.day
+        for x in daily:
+            day += 1
+            window[:, day % w] = x
+            num = decay * num + x
+            den = decay * den + (self.first_day <= day)
+        return DemandState(self.product_ids, day, self.first_day, window, num, den, self.alpha)
+
+    def stats(self):
+        # DataFrame indexed by product_id: days, mean, std (rolling), level (smoothed)
+        days = self.day - self.first_day + 1
+        n = np.minimum(days, self.window.shape[1]).astype(float)
+        total = self.window.sum(axis=1)
+        var = (np.square(self.window).sum(axis=1) - total ** 2 / n) / np.where(n > 1, n - 1, np.nan)
+        return pd.DataFrame({'days': days, 'mean': total / n, 'std': np.sqrt(np.clip(var, 0, None)),
+                             'level': self.num / self.den}, index=self.product_ids)
+
+
+def fit(history, window=FORECAST_WINDOW, alpha=SMOOTHING_ALPHA):
+    # One pass over the whole history: per-row weights and bincounts, no per-product loop
+    codes, ids = pd.factorize(history['product_id'])
+    day = history['day'].to_numpy()
+    qty = history['quantity'].to_numpy()
+    n, last = len(ids), int(day.max())
+    first = np.full(n, last, dtype=np.int64)
+    np.minimum.at(first, codes, day)
+
+    decay = 1 - alpha
+    num = np.bincount(codes, qty * decay ** (last - day), minlength=n)
+    den = (1 - decay ** (last - first + 1)) / alpha
+
+    # Same-day rows are summed before they enter the window
+    recent = day > last - window
+    buffer = np.zeros((n, window))
+    np.add.at(buffer, (codes[recent], day[recent] % window), qty[recent])
+    return DemandState(pd.Index(np.asarray(ids, dtype=object)), last, first, buffer, num, den, alpha)
+
+
+def fit_history(path, window=FORECAST_WINDOW, alpha=SMOOTHING_ALPHA):
+    if not os.path.exists(path):
+        return None
+    history = read_history(path)
+    if history.empty:
+        return None
+    state = fit(history, window, alpha)
+    state.source = _source(path)
+    return state
+
+
+def _source(path):
+    if path.lower().endswith(('.parquet', '.pq')):
+        return None
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.seek(max(0, offset - _TAIL_CHECK))
+        return path, offset, f.read()
+
+
+def extend_history(state, path, window=FORECAST_WINDOW, alpha=SMOOTHING_ALPHA):
+    # Reads only the bytes appended since the last read. Falls back to a full fit
+    # when the file was rewritten, or the new rows add products or revisit past days.
+    if state is None or state.source is None or state.source[0] != path or not os.path.exists(path):
+        return fit_history(path, window, alpha)
+    _, offset, check = state.source
+    with open(path, 'rb') as f:
+        f.seek(max(0, offset - len(check)))
+        if f.read(len(check)) != check or not check.endswith(b'\n'):
+            return fit_history(path, window, alpha)
+        if os.fstat(f.fileno()).st_size == offset:
+            return state
+        rows = _typed(pd.read_csv(f, names=HISTORY_COLUMNS, header=None, dtype={'product_id': str}))
+    pos = state.product_ids.get_indexer(rows['product_id'])
+    day = rows['day'].to_numpy() - state.day - 1
+    if (pos < 0).any() or (day < 0).any():
+        return fit_history(path, window, alpha)
+    daily = np.zeros((int(day.max(initial=-1)) + 1, len(state.product_ids)))
+    np.add.at(daily, (day, pos), rows['quantity'].to_numpy())
+    state = state.advance(daily)
+    state.source = _source(path)
+    return state
+
+
+# ---- optimiser inputs ----
+def safety_stock(std, lead_time, service_level=SERVICE_LEVEL):
+    # z * sigma * sqrt(L): covers demand over the lead time at the given service level
+    return NormalDist().inv_cdf(service_level) * std * np.sqrt(lead_time)
+
+
+def apply_forecast(df, state, service_level=SERVICE_LEVEL):
+    # Replaces demand_rate (smoothed level) and safety_stock for products with at
+    # least MIN_HISTORY_DAYS of history; the rest keep their typed values
+    if state is None or df.empty:
+        return df
+    stats = state.stats()
+    pos = stats.index.get_indexer(df['product_id'])
+    found = pos >= 0
+
+    def take(col):
+        return np.where(found, stats[col].to_numpy()[pos], np.nan)
+
+    use = found & (take('days') >= MIN_HISTORY_DAYS) & np.isfinite(take('std'))
+    if not use.any():
+        return df
+    lead_time = df['lead_time'].to_numpy(dtype=float)
+    dtype = df['demand_rate'].dtype
+    df['demand_rate'] = np.where(use, take('level'), df['demand_rate']).astype(dtype)
+    df['safety_stock'] = np.where(use, safety_stock(take('std'), lead_time, service_level),
+                                  df['safety_stock']).astype(dtype)
+    return df
+
+
+if __name__ == '__main__':
+    import argparse
+    from ingest import add_reorder_point
+    from utils import DEMAND_HISTORY_PATH, load_data
+    parser = argparse.ArgumentParser(description='Forecast demand and safety stock from daily history.')
+    parser.add_argument('path', nargs='?', default=DEMAND_HISTORY_PATH)
+    parser.add_argument('--service-level', type=float, default=SERVICE_LEVEL)
+    parser.add_argument('--out', default=None, help='CSV output path (default: print)')
+    args = parser.parse_args()
+    state = fit_history(args.path)
+    if state is None:
+        raise SystemExit(f'no demand history at {args.path}')
+    df = load_data(['product_id', 'demand_rate', 'lead_time', 'safety_stock'])
+    df = add_reorder_point(apply_forecast(df, state, args.service_level))
+    out = df.join(state.stats()[['days', 'mean', 'std']], on='product_id')
+    if args.out:
+        out.to_csv(args.out, index=False)
+    else:
+        print(out.to_string(index=False))
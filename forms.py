@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, FloatField, SubmitField, FormField
+from wtforms import StringField, PasswordField, FloatField, SubmitField, FormField, HiddenField
 from wtforms.fields import FieldList
 from wtforms.validators import DataRequired, NumberRange
 
@@ -9,7 +9,11 @@ class LoginForm(FlaskForm):
     submit = SubmitField('Login')
 
 class InventoryItemForm(FlaskForm):
+    class Meta:
+        csrf = False  # nested in InventoryForm, which carries the token
+
     product_id = StringField('Product ID', render_kw={'readonly': True})
+    row_version = HiddenField()  # as loaded; a newer stored row makes the save a conflict
     product_name = StringField('Product Name', validators=[DataRequired()])
     item_description = StringField('Description', validators=[DataRequired()])
     purpose = StringField('Purpose', validators=[DataRequired()])
@@ -26,4 +30,5 @@ class InventoryForm(FlaskForm):
 class SettingsForm(FlaskForm):
     budget = FloatField('Budget (000s USD)', validators=[DataRequired(), NumberRange(min=0)])
     warehouse_capacity = FloatField('Warehouse Capacity (000s units)', validators=[DataRequired(), NumberRange(min=0)])
+    version = HiddenField()
     submit = SubmitField('Update Settings')
\ No newline at end of file
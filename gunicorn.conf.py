@@ -0,0 +1,14 @@
+# gunicorn.conf.py -- read by `gunicorn wsgi:application` from this directory
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:8050')
+# One process per core; override with WEB_CONCURRENCY
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))
+# Threads per worker: an /api/events stream holds one for up to EVENTS_MAX_SECONDS
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '8'))
+# A first CBC solve on a large catalog can take a while
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+# Each worker imports the app itself: the solver pool and renderer thread do not survive fork
+preload_app = False
@@ -0,0 +1,117 @@
+# ingest.py
+# Typed, chunked reading of inventory feeds (CSV, Parquet, Feather/Arrow).
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from inventory_store import COLUMNS, NUMERIC_COLUMNS
+
+# Numbers are in thousands, float32 is plenty; repeated text becomes categorical
+DTYPES = {
+    'product_id': 'object',
+    'product_name': 'object',
+    'description': 'category',
+    'purpose': 'category',
+    **{c: 'float32' for c in NUMERIC_COLUMNS},
+}
+CATEGORICAL_COLUMNS = [c for c, t in DTYPES.items() if t == 'category']
+
+# What the optimiser and the summary charts need; text is fetched on demand
+DASHBOARD_COLUMNS = ['product_id', 'purpose'] + NUMERIC_COLUMNS
+
+CHUNK_SIZE = 250_000
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+
+def apply_dtypes(df, numeric='float32'):
+    # numeric='float64' keeps full precision, e.g. when importing into the store
+    return df.astype({c: (numeric if c in NUMERIC_COLUMNS else t)
+                      for c, t in DTYPES.items() if c in df.columns})
+
+
+def add_reorder_point(df):
+    if {'demand_rate', 'lead_time', 'safety_stock'} <= set(df.columns):
+        df['reorder_point'] = df['demand_rate'] * df['lead_time'] + df['safety_stock']
+    return df
+
+
+def validate(df, offset=0):
+    # Raises ValueError naming the first offending rows (0-based data row numbers)
+    if 'product_id' not in df.columns:
+        raise ValueError('missing column: product_id')
+    bad = df['product_id'].isna().to_numpy().copy()
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy()
+            bad |= np.isnan(values) | (values < 0)
+    if bad.any():
+        rows = (np.flatnonzero(bad)[:5] + offset).tolist()
+        raise ValueError(f'{int(bad.sum())} invalid row(s) (missing id, or missing/negative numbers), e.g. rows {rows}')
+    return df
+
+
+def _check_unique(ids, seen, offset=0):
+    # product_id is the key: a repeated id, within or across chunks, is an error
+    dup = (ids.duplicated() | ids.isin(seen)).to_numpy()
+    if dup.any():
+        rows = (np.flatnonzero(dup)[:5] + offset).tolist()
+        raise ValueError(f'{int(dup.sum())} duplicate product_id(s), e.g. {ids[dup].head(5).tolist()} '
+                         f'at rows {rows}')
+    seen.update(ids)
+
+
+def concat_chunks(chunks, columns=None):
+    # pd.concat turns categoricals with differing categories into object; union them instead
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame({c: pd.Series(dtype=DTYPES.get(c, 'object')) for c in (columns or COLUMNS)})
+    out = pd.concat(chunks, ignore_index=True)
+    for col in CATEGORICAL_COLUMNS:
+        if col in out.columns and out[col].dtype != 'category':
+            out[col] = union_categoricals([c[col] for c in chunks], ignore_order=True)
+    return out
+
+
+def iter_inventory_chunks(path, columns=None, chunksize=CHUNK_SIZE, with_reorder_point=True,
+                          numeric='float32'):
+    # Yields validated, typed chunks; only the requested columns are ever parsed.
+    # path may also be an open CSV stream, e.g. a request body.
+    ext = os.path.splitext(path)[1].lower() if isinstance(path, (str, os.PathLike)) else '.csv'
+    yield from validated_chunks(_raw_chunks(path, ext, columns, chunksize), with_reorder_point, numeric)
+
+
+def validated_chunks(chunks, with_reorder_point=True, numeric='float32'):
+    # Types and validates raw frames from any source; error row numbers count across chunks
+    offset = 0
+    seen = set()
+    for chunk in chunks:
+        chunk = validate(apply_dtypes(chunk, numeric), offset)
+        _check_unique(chunk['product_id'], seen, offset)
+        offset += len(chunk)
+        yield add_reorder_point(chunk) if with_reorder_point else chunk
+
+
+def read_inventory(path, columns=None, chunksize=CHUNK_SIZE, with_reorder_point=True, numeric='float32'):
+    return concat_chunks(iter_inventory_chunks(path, columns, chunksize, with_reorder_point, numeric), columns)
+
+
+def _raw_chunks(path, ext, columns, chunksize):
+    if ext in PARQUET_EXTENSIONS or ext in FEATHER_EXTENSIONS:
+        try:
+            import pyarrow.dataset as ds
+        except ImportError as exc:
+            raise ImportError('Reading Parquet/Arrow inventory files requires pyarrow') from exc
+        fmt = 'parquet' if ext in PARQUET_EXTENSIONS else 'ipc'
+        # Column projection and record batches: only the requested columns are decoded
+        scanner = ds.dataset(path, format=fmt).scanner(columns=columns, batch_size=chunksize)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+    # Parse numbers at full precision; apply_dtypes narrows them afterwards
+    dtypes = {c: ('float64' if c in NUMERIC_COLUMNS else str if t == 'object' else t)
+              for c, t in DTYPES.items() if columns is None or c in columns}
+    yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
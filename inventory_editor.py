@@ -0,0 +1,98 @@
+# inventory_editor.py
+# Paging and diff helpers shared by the edit_inventory views
+from werkzeug.datastructures import MultiDict
+
+from inventory_store import COLUMNS
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# form field name -> store column
+FIELD_TO_COLUMN = {
+    'product_id': 'product_id',
+    'product_name': 'product_name',
+    'item_description': 'description',
+    'purpose': 'purpose',
+    'stock': 'stock',
+    'demand_rate': 'demand_rate',
+    'lead_time': 'lead_time',
+    'reorder_cost': 'reorder_cost',
+    'safety_stock': 'safety_stock',
+}
+
+SAMPLE_ROW = {
+    'product_id': 'P001', 'product_name': 'Sample Widget', 'description': 'Example item',
+    'purpose': 'Demo', 'stock': 100, 'demand_rate': 10, 'lead_time': 5,
+    'reorder_cost': 50, 'safety_stock': 20,
+}
+
+
+def page_args(args):
+    # Read page/filter/sort from the query string, clamped to sane values
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except ValueError:
+        page = 1
+    try:
+        per_page = min(MAX_PAGE_SIZE, max(1, int(args.get('per_page', PAGE_SIZE))))
+    except ValueError:
+        per_page = PAGE_SIZE
+    sort = args.get('sort', 'product_id')
+    if sort not in COLUMNS:
+        sort = 'product_id'
+    return {
+        'page': page,
+        'per_page': per_page,
+        'q': args.get('q', '').strip(),
+        'sort': sort,
+        'desc': args.get('desc') == '1',
+    }
+
+
+def load_page(store, args):
+    page, total = store.query_page(offset=(args['page'] - 1) * args['per_page'],
+                                   limit=args['per_page'], search=args['q'] or None,
+                                   sort=args['sort'], descending=args['desc'], with_version=True)
+    pages = max(1, -(-total // args['per_page']))
+    return page, total, pages
+
+
+def form_data_for(rows):
+    # Pre-fill MultiDict for the FieldList, one entry per row of the page
+    form_data = MultiDict()
+    for idx, row in enumerate(rows):
+        for field, col in FIELD_TO_COLUMN.items():
+            form_data.add(f'inventory-{idx}-{field}', str(row.get(col, '')))
+        form_data.add(f'inventory-{idx}-row_version', str(row.get('row_version', '')))
+    return form_data
+
+
+def submitted_rows(form):
+    return [{col: getattr(sub, field).data for field, col in FIELD_TO_COLUMN.items()}
+            for sub in form.inventory]
+
+
+def expected_versions(form):
+    # product_id -> row_version the page showed; None for a row not stored yet
+    return {sub.product_id.data: int(sub.row_version.data) if (sub.row_version.data or '').isdigit() else None
+            for sub in form.inventory}
+
+
+def changed_rows(rows, current):
+    # Keep only rows that differ from what is stored; the browser already drops
+    # untouched rows, this also guards against clients that post the full page
+    stored = current.set_index('product_id').to_dict('index')
+    changed = []
+    for row in rows:
+        before = stored.get(row['product_id'])
+        if before is None or any(_differs(row[c], before.get(c)) for c in COLUMNS[1:]):
+            changed.append(row)
+    return changed
+
+
+def _differs(new, old):
+    if new is None or old is None:
+        return new is not old
+    if isinstance(new, (int, float)) and isinstance(old, (int, float)):
+        return float(new) != float(old)
+    return str(new) != str(old)
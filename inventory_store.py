@@ -0,0 +1,319 @@
+# inventory_store.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from atomicfile import atomic_write
+
+COLUMNS = ['product_id', 'product_name', 'description', 'purpose',
+           'stock', 'demand_rate', 'lead_time', 'reorder_cost', 'safety_stock']
+TEXT_COLUMNS = COLUMNS[:4]
+NUMERIC_COLUMNS = COLUMNS[4:]
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS inventory (
+    product_id TEXT PRIMARY KEY,
+    {', '.join(f'{c} TEXT' for c in TEXT_COLUMNS[1:])},
+    {', '.join(f'{c} REAL' for c in NUMERIC_COLUMNS)},
+    row_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE INDEX IF NOT EXISTS ix_inventory_name ON inventory (product_name);
+CREATE INDEX IF NOT EXISTS ix_inventory_purpose ON inventory (purpose);
+CREATE INDEX IF NOT EXISTS ix_inventory_stock ON inventory (stock);
+CREATE INDEX IF NOT EXISTS ix_inventory_cost ON inventory (reorder_cost);
+"""
+
+_UPDATABLE = COLUMNS[1:]
+_UPSERT = (
+    f"INSERT INTO inventory ({', '.join(COLUMNS)}, row_version) VALUES ({', '.join('?' * (len(COLUMNS) + 1))}) "
+    f"ON CONFLICT(product_id) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in _UPDATABLE + ['row_version'])} "
+    # Identical rows are left alone so they do not bump the version
+    f"WHERE {' OR '.join(f'{c} IS NOT excluded.{c}' for c in _UPDATABLE)}"
+)
+
+# Readers further behind than this many changed rows reload everything
+MAX_DELTA_ROWS = 10_000
+
+
+class VersionConflict(Exception):
+    """A compare-and-swap write found a newer version than the caller had read."""
+
+    def __init__(self, message, current=None, product_ids=()):
+        super().__init__(message)
+        self.current = current
+        self.product_ids = list(product_ids)
+
+
+class InventoryStore:
+    """SQLite-backed inventory with per-row upserts and a change version."""
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    # Readers never wait for a writer, and see only committed transactions
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    with conn:
+                        conn.executescript(_SCHEMA)
+                        # Stores created before per-row versions get the column added
+                        if 'row_version' not in {r[1] for r in conn.execute("PRAGMA table_info(inventory)")}:
+                            conn.execute("ALTER TABLE inventory ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+                        conn.execute("CREATE INDEX IF NOT EXISTS ix_inventory_row_version ON inventory (row_version)")
+                        conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', '0')")
+                        conn.execute("INSERT OR IGNORE INTO meta VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+                    self._ready = True
+        return conn
+
+    # ---- versioning ----
+    @classmethod
+    def _bump(cls, conn, reset=False):
+        # Returns the new version; reset=True marks a change readers cannot apply row by row
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+        version = int(cls._meta(conn, 'version'))
+        # Compared with the CSV's mtime: a file older than the last write is not imported
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_write', ?)", (str(time.time_ns()),))
+        if reset:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('reset_version', ?)", (str(version),))
+        return version
+
+    @staticmethod
+    def _meta(conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def version(self):
+        with closing(self._connect()) as conn:
+            return int(self._meta(conn, 'version', 0))
+
+    def version_token(self):
+        # Unique across re-created databases, so it is safe as a persisted cache key.
+        # Polled on every request: read on a kept connection, which skips the
+        # schema load a new one pays (0.5ms -> 0.01ms)
+        meta = dict(self._reader().execute(
+            "SELECT key, value FROM meta WHERE key IN ('store_id', 'version')").fetchall())
+        return f"{meta['store_id']}:{meta.get('version', 0)}"
+
+    def _reader(self):
+        # One autocommit connection per thread (each query sees the latest commit),
+        # reopened after a fork or when the database file was replaced
+        ident = (os.getpid(), os.stat(self.db_path).st_ino if os.path.exists(self.db_path) else None)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.ident != ident:
+            if conn is not None:
+                conn.close()
+            conn = self._local.conn = self._connect()
+            self._local.ident = ident
+        return conn
+
+    # ---- reads ----
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+
+    def load_frame(self, columns=None, chunksize=250_000):
+        # Typed read (categorical text, float32 numbers), converted chunk by chunk
+        import pandas as pd
+        from ingest import apply_dtypes, concat_chunks
+        cols = columns or COLUMNS
+        with closing(self._connect()) as conn:
+            chunks = pd.read_sql_query(f"SELECT {', '.join(cols)} FROM inventory ORDER BY rowid",
+                                       conn, chunksize=chunksize)
+            return concat_chunks((apply_dtypes(c) for c in chunks), cols)
+
+    def get_rows(self, product_ids):
+        import pandas as pd
+        self.sync_from_csv()
+        product_ids = list(product_ids)
+        if not product_ids:
+            return pd.DataFrame(columns=COLUMNS)
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (product_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM wanted")
+            conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", [(p,) for p in product_ids])
+            return pd.read_sql_query(
+                f"SELECT {', '.join('i.' + c for c in COLUMNS)} FROM inventory i "
+                "JOIN wanted USING (product_id) ORDER BY i.rowid", conn)
+
+    def query_page(self, offset=0, limit=50, search=None, sort='product_id', descending=False,
+                   with_version=False):
+        # Filtering, sorting and paging all happen in SQLite; returns (page frame, matching rows).
+        # with_version adds each row's row_version, for compare-and-swap edits
+        import pandas as pd
+        cols = COLUMNS + ['row_version'] if with_version else COLUMNS
+        self.sync_from_csv()
+        if sort not in COLUMNS:
+            sort = 'product_id'
+        where, params = '', []
+        if search:
+            where = 'WHERE ' + ' OR '.join(f'{c} LIKE ?' for c in TEXT_COLUMNS)
+            params = [f'%{search}%'] * len(TEXT_COLUMNS)
+        order = f"{sort} {'DESC' if descending else 'ASC'}, rowid"
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM inventory {where}", params).fetchone()[0]
+            page = pd.read_sql_query(
+                f"SELECT {', '.join(cols)} FROM inventory {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                conn, params=params + [int(limit), int(offset)])
+        return page, total
+
+    def changes_since(self, version, columns=None):
+        # (rows changed after version, current version), or None when the reader
+        # has to reload everything: rows were deleted/replaced, or too many changed
+        from ingest import apply_dtypes
+        import pandas as pd
+        cols = columns or COLUMNS
+        with closing(self._connect()) as conn:
+            current = int(self._meta(conn, 'version', 0))
+            if int(self._meta(conn, 'reset_version', 0)) > version:
+                return None
+            if current == version:
+                return pd.DataFrame(columns=cols), current
+            n = conn.execute("SELECT COUNT(*) FROM inventory WHERE row_version > ?", (version,)).fetchone()[0]
+            if n > MAX_DELTA_ROWS:
+                return None
+            records = conn.execute(f"SELECT {', '.join(cols)} FROM inventory WHERE row_version > ? "
+                                   "ORDER BY rowid", (version,)).fetchall()
+        return apply_dtypes(pd.DataFrame.from_records(records, columns=cols)), current
+
+    # ---- writes (each one a single transaction) ----
+    def upsert_rows(self, rows, expected=None):
+        # rows: iterable of dicts keyed by COLUMNS; returns the number of rows changed.
+        # expected: product_id -> row_version the caller read (None: the row must not
+        # exist yet); raises VersionConflict, writing nothing, if any of them moved on
+        rows = list(rows)
+        self.sync_from_csv()
+        with closing(self._connect()) as conn, conn:
+            # Bumping first takes the write lock; changed rows are stamped with the new version
+            version = self._bump(conn)
+            if expected:
+                self._check_rows(conn, {r['product_id']: expected[r['product_id']]
+                                        for r in rows if r['product_id'] in expected})
+            before = conn.total_changes
+            conn.executemany(_UPSERT, [tuple(r.get(c) for c in COLUMNS) + (version,) for r in rows])
+            changed = conn.total_changes - before
+            if not changed:
+                conn.rollback()
+        return changed
+
+    def upsert_frames(self, frames, expected_version=None):
+        # Bulk upsert of DataFrames with all COLUMNS in one transaction; an error
+        # raised while iterating frames (e.g. validation) rolls the whole batch back.
+        # expected_version: store version the caller read; anything newer raises
+        # VersionConflict. Returns (rows received, rows changed).
+        received = 0
+        self.sync_from_csv()
+        with closing(self._connect()) as conn, conn:
+            version = self._bump(conn)
+            if expected_version is not None and version - 1 != expected_version:
+                raise VersionConflict(f'inventory is at version {version - 1}, not {expected_version}',
+                                      current=version - 1)
+            before = conn.total_changes
+            for df in frames:
+                df = df.reindex(columns=COLUMNS).astype(object)
+                conn.executemany(_UPSERT, (row + (version,) for row in
+                                           df.where(df.notna(), None).itertuples(index=False, name=None)))
+                received += len(df)
+            changed = conn.total_changes - before
+            if not changed:
+                conn.rollback()
+        return received, changed
+
+    @staticmethod
+    def _check_rows(conn, expected):
+        # Inside the write transaction, so no other writer can slip in between
+        current = {}
+        ids = list(expected)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            current.update(conn.execute(
+                f"SELECT product_id, row_version FROM inventory WHERE product_id IN ({', '.join('?' * len(chunk))})",
+                chunk).fetchall())
+        stale = [p for p, v in expected.items() if current.get(p) != v]
+        if stale:
+            raise VersionConflict(f'{len(stale)} row(s) changed since they were read: {", ".join(stale[:10])}',
+                                  product_ids=stale)
+
+    def delete_rows(self, product_ids):
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany("DELETE FROM inventory WHERE product_id = ?",
+                                   [(p,) for p in product_ids])
+            if cur.rowcount:
+                self._bump(conn, reset=True)
+            return cur.rowcount
+
+    def replace_all(self, frames):
+        # frames: a DataFrame or an iterable of chunks, written in one transaction
+        import pandas as pd
+        if isinstance(frames, pd.DataFrame):
+            frames = [frames]
+        insert = (f"INSERT INTO inventory ({', '.join(COLUMNS)}, row_version) "
+                  f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})")
+        with closing(self._connect()) as conn, conn:
+            # Re-imported rows get the new version, so edits read before the import conflict
+            version = self._bump(conn, reset=True)
+            conn.execute("DELETE FROM inventory")
+            for df in frames:
+                df = df.reindex(columns=COLUMNS).astype(object)
+                conn.executemany(insert, (row + (version,) for row in
+                                          df.where(df.notna(), None).itertuples(index=False, name=None)))
+
+    # ---- CSV compatibility ----
+    def import_csv(self, path=None):
+        # Streams the file (CSV, Parquet or Feather) chunk by chunk with validation
+        from ingest import iter_inventory_chunks
+        path = path or self.csv_path
+        self.replace_all(iter_inventory_chunks(path, with_reorder_point=False, numeric='float64'))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_mtime', ?)",
+                         (str(os.stat(path).st_mtime_ns),))
+
+    def sync_from_csv(self):
+        # Re-import when the CSV changed on disk after the store was last written:
+        # the newer side wins. A changed file that is older than the last edit
+        # (e.g. restored with its old mtime) is ignored, so edits are not lost.
+        # Run before page/row reads and every upsert, so an edit always lands on
+        # the imported rows rather than being wiped by the import that follows.
+        if not self.csv_path or not os.path.exists(self.csv_path):
+            return False
+        mtime = str(os.stat(self.csv_path).st_mtime_ns)
+        with closing(self._connect()) as conn:
+            if self._meta(conn, 'csv_mtime') == mtime:
+                return False
+            stale = int(mtime) < int(self._meta(conn, 'last_write', 0))
+        if stale:
+            logger.warning('Not importing %s: it is older than the last change to the store', self.csv_path)
+            with closing(self._connect()) as conn, conn:
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_mtime', ?)", (mtime,))
+            return False
+        try:
+            self.import_csv(self.csv_path)
+        except ValueError as exc:
+            # Keep serving the stored inventory; don't retry until the file changes again
+            logger.warning('Skipping invalid inventory file %s: %s', self.csv_path, exc)
+            with closing(self._connect()) as conn, conn:
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_mtime', ?)", (mtime,))
+            return False
+        return True
+
+    def export_csv(self, path=None):
+        path = path or self.csv_path
+        with atomic_write(path, newline='') as f:
+            self.load_frame().to_csv(f, index=False)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_mtime', ?)",
+                         (str(os.stat(path).st_mtime_ns),))
@@ -0,0 +1,49 @@
+# lazy.py
+# Deferred construction of heavy parts of the web apps (Dash, pandas, Plotly,
+# PuLP, Kaleido), so a fresh process can answer its first request quickly.
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyDash:
+    """WSGI app that builds a Dash app on its first request (or on load())."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._app is not None
+
+    def load(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._factory()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        return self.load().server(environ, start_response)
+
+
+def warm_kaleido():
+    # Kaleido starts a Chromium subprocess on the first export; do it off the request path
+    import plotly.graph_objects as go
+    go.Figure().to_image(format='png', width=10, height=10)
+
+
+def prewarm(*steps):
+    # Runs each step in order on a daemon thread; failures are logged, not raised
+    def run():
+        for step in steps:
+            try:
+                step()
+            except Exception:
+                logger.exception('prewarm step %s failed', getattr(step, '__name__', step))
+    thread = threading.Thread(target=run, name='prewarm', daemon=True)
+    thread.start()
+    return thread
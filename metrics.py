@@ -0,0 +1,206 @@
+# metrics.py
+# In-process latency histograms, counters and gauges, rendered in the
+# Prometheus text format by the /metrics route.
+#
+#   with timed('model_build'):
+#       ...
+#
+# Recording is a perf_counter pair plus a bisect under a lock, so the hooks
+# stay in place in production. Optional per-request cProfile is enabled with
+# PROFILE_REQUESTS=1 and ?profile=1 on the request (see init_app).
+import cProfile
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; covers a cached lookup up to a long CBC solve
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '0') == '1'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'data/output/profiles')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    parts = []
+    for k, v in labels:
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{k}="{v}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        i = bisect_left(self.buckets, value)
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(k, list(v)) for k, v in sorted(self._series.items())]
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{_label_text(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_label_text(labels + (("le", "+Inf"),))} {series[-1]}')
+            lines.append(f'{self.name}_sum{_label_text(labels)} {series[-2]}')
+            lines.append(f'{self.name}_count{_label_text(labels)} {series[-1]}')
+        return lines
+
+
+class Counter:
+
+    kind = 'counter'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f'{self.name}{_label_text(labels)} {value}' for labels, value in items]
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []   # callables run at scrape time: fn() -> None
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help, buckets))
+
+    def counter(self, name, help):
+        return self.add(Counter(name, help))
+
+    def gauge(self, name, help):
+        return self.add(Gauge(name, help))
+
+    def collector(self, fn):
+        # Refreshes gauges from other components (renderer, caches) on each scrape
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        for fn in self._collectors:
+            fn()
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram('supplychain_stage_seconds', 'Time spent per pipeline stage.')
+request_seconds = registry.histogram('supplychain_http_request_seconds', 'Flask request latency.')
+solves = registry.counter('supplychain_solves_total', 'Reorder solves by path and solver status.')
+model_variables = registry.gauge('supplychain_model_variables', 'Variables in the last reorder model.')
+model_constraints = registry.gauge('supplychain_model_constraints', 'Constraints in the last reorder model.')
+
+
+@contextmanager
+def timed(stage, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage, **labels)
+
+
+def observe_solve(result):
+    # result: optimizer.ReorderResult; stats are only set when a model was built
+    import pulp
+    solves.inc(path=result.path, status=pulp.LpStatus.get(result.status, result.status))
+    stats = result.stats or {}
+    if 'variables' in stats:
+        model_variables.set(stats['variables'])
+        model_constraints.set(stats['constraints'])
+    for stage in ('model_build', 'solve'):
+        if f'{stage}_seconds' in stats:
+            stage_seconds.observe(stats[f'{stage}_seconds'], stage=stage)
+
+
+# ---- Flask integration ----
+def init_app(server, endpoint=True):
+    # Request latency per route, optional profiling and (endpoint=True) the /metrics route
+    from flask import Response, g, request
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        if PROFILE_REQUESTS and request.args.get('profile') == '1':
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @server.after_request
+    def _record(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            response.headers['X-Profile'] = save_profile(profiler, request.endpoint or 'unknown')
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule else 'unmatched'
+            request_seconds.observe(time.perf_counter() - start, route=rule,
+                                    method=request.method, status=response.status_code)
+        return response
+
+    if endpoint:
+        @server.route('/metrics')
+        def metrics():
+            return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def save_profile(profiler, name):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.prof')
+    pstats.Stats(profiler).dump_stats(path)
+    return path
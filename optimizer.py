@@ -1,72 +1,274 @@
-import pandas as pd
-import plotly.express as px
+from collections import Counter, namedtuple
+import numpy as np
 import pulp
-from utils import load_data, load_settings, save_settings
-from datetime import datetime
-import os
+from metrics import observe_solve
+import time
+
+# Each reorder brings in 50k units against the warehouse capacity
+UNITS_PER_ORDER = 50
+
+# The formulation the dashboard, API and scenario sweeps solve: big-M of 1e6 and
+# no upper bound, stock above the reorder point is left to the objective
+BIG_M = 1_000_000
+FORCE_SKIP_ABOVE = False
+
+
+def build_reorder_model(cost, stock, reorder_point, budget, capacity,
+                        big_m=10000, force_skip_above=True, units_per_order=UNITS_PER_ORDER):
+    # Single pass over NumPy columns: no per-product DataFrame lookups
+    cost = np.asarray(cost, dtype=float)
+    stock = np.asarray(stock, dtype=float)
+    reorder_point = np.asarray(reorder_point, dtype=float)
+    n = len(cost)
 
-def load_and_optimize():
-    df = load_data()
-    if df is None:
-        empty_df = pd.DataFrame(columns=[
-            'product_id','product_name','description','purpose','stock',
-            'demand_rate','lead_time','reorder_cost','safety_stock','reorder_point','should_reorder'
-        ])
-        empty_fig = px.bar(title="No Data Available")
-        return empty_df, empty_fig, empty_fig
-
-    df['reorder_point'] = df['demand_rate'] * df['lead_time'] + df['safety_stock']
-
-    # Settings
-    settings_file = 'data/settings.json'
-    if not os.path.exists(settings_file):
-        default_settings = {"budget": 1000, "warehouse_capacity": 1000}
-        save_settings(default_settings)
-        settings = default_settings
-    else:
-        settings = load_settings()
-        settings.setdefault('budget', 1000)
-        settings.setdefault('warehouse_capacity', 1000)
-
-    # Optimization
     prob = pulp.LpProblem("Inventory_Optimization", pulp.LpMinimize)
-    reorder = pulp.LpVariable.dicts("Reorder", df['product_id'], cat='Binary')
-
-    prob += pulp.lpSum([reorder[pid]*df.loc[df['product_id']==pid,'reorder_cost'].iloc[0] for pid in df['product_id']])
-
-    M = 10000
-    for pid in df['product_id']:
-        stock = df.loc[df['product_id']==pid,'stock'].iloc[0]
-        reorder_point = df.loc[df['product_id']==pid,'reorder_point'].iloc[0]
-        prob += reorder[pid] >= max(0,(reorder_point-stock)/M)
-        prob += reorder[pid] <= min(1,1-max(0,(stock-reorder_point-1)/M))
-
-    prob += pulp.lpSum([reorder[pid]*df.loc[df['product_id']==pid,'reorder_cost'].iloc[0] for pid in df['product_id']]) <= settings['budget']
-    prob += pulp.lpSum([reorder[pid]*50 for pid in df['product_id']]) <= settings['warehouse_capacity']
-
-    status = prob.solve()
-    if status == pulp.LpStatusOptimal:
-        df['should_reorder'] = [reorder[pid].varValue for pid in df['product_id']]
-    else:
-        df['should_reorder'] = 0
-
-    # Figures
-    fig = px.bar(df, x='product_id', y='stock', color='should_reorder',
-                 title='Inventory Levels and Reorder Decisions', color_continuous_scale='Viridis')
-    fig.add_hline(y=df['reorder_point'].mean(), line_dash="dash", line_color="red",
-                  annotation_text="Avg Reorder Point", annotation_font_size=16, annotation_font_color="red")
-    fig.update_traces(hovertemplate='Product: %{x}<br>Name: %{customdata[0]}<br>Description: %{customdata[1]}<br>Purpose: %{customdata[2]}<br>Stock: %{y}k units<br>Demand: %{customdata[3]}k/day<br>Lead Time: %{customdata[4]} days<br>Safety Stock: %{customdata[5]}k units',
-                      customdata=df[['product_name','description','purpose','demand_rate','lead_time','safety_stock']])
-
-    fig2 = px.bar(df, x='product_id', y='reorder_cost',
-                  title='Reorder Costs by Product', color_continuous_scale='Plasma')
-
-    # Save outputs
-    today = datetime.now().strftime('%Y-%m-%d')
-    output_folder = f'data/images/outputdashboards/{today}'
-    os.makedirs(output_folder, exist_ok=True)
-    fig.write_image(f'{output_folder}/inventory_dashboard.png')
-    fig2.write_image(f'{output_folder}/cost-to-reorder.png')
-    df.to_csv('data/output/inventory_dashboard.csv', index=False)
-
-    return df, fig, fig2
+    reorder = [pulp.LpVariable(f"reorder_{i}", cat='Binary') for i in range(n)]
+
+    prob += pulp.LpAffineExpression(zip(reorder, cost.tolist()))
+    prob += pulp.LpAffineExpression(zip(reorder, cost.tolist())) <= budget, "budget"
+    prob += pulp.LpAffineExpression((v, units_per_order) for v in reorder) <= capacity, "capacity"
+
+    # Force a reorder below the reorder point, optionally forbid it well above it.
+    # Only binding rows are emitted; x >= 0 and x <= 1 already hold for binaries.
+    lower = np.maximum(0.0, (reorder_point - stock) / big_m)
+    for i in np.flatnonzero(lower > 0):
+        prob += reorder[i] >= lower[i], f"force_{i}"
+    if force_skip_above:
+        upper = np.minimum(1.0, 1 - np.maximum(0.0, (stock - reorder_point - 1) / big_m))
+        for i in np.flatnonzero(upper < 1):
+            prob += reorder[i] <= upper[i], f"skip_{i}"
+
+    return prob, reorder
+
+
+def solve_reorder_model(prob, reorder, warm_start=None):
+    # warm_start: previous 0/1 decisions, passed to CBC as the initial solution
+    if warm_start is not None:
+        for v, d in zip(reorder, warm_start):
+            v.setInitialValue(int(d))
+    status = prob.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=warm_start is not None))
+    if status != pulp.LpStatusOptimal:
+        return np.zeros(len(reorder), dtype=int), status
+    return np.array([round(v.varValue or 0) for v in reorder], dtype=int), status
+
+
+# decisions: 0/1 array aligned with the input rows
+# path: 'closed_form' when the answer was computed directly, 'cbc' when the MILP was solved,
+#       'delta' when the previous solution was proven to still be optimal
+# stats: model size and build/solve seconds when a model was built (see metrics.observe_solve)
+ReorderResult = namedtuple('ReorderResult', ['decisions', 'status', 'path', 'stats'], defaults=(None,))
+
+
+def solve_cbc(cost, stock, reorder_point, budget, capacity, big_m=10000, force_skip_above=True):
+    start = time.perf_counter()
+    prob, reorder = build_reorder_model(cost, stock, reorder_point, budget, capacity,
+                                        big_m=big_m, force_skip_above=force_skip_above)
+    built = time.perf_counter()
+    decisions, status = solve_reorder_model(prob, reorder)
+    stats = {'variables': prob.numVariables(), 'constraints': prob.numConstraints(),
+             'model_build_seconds': built - start, 'solve_seconds': time.perf_counter() - built}
+    return ReorderResult(decisions, status, 'cbc', stats)
+
+# How often each path produced the answer, to see how many CBC launches are avoided
+solve_path_counts = Counter()
+
+
+def closed_form_reorders(cost, stock, reorder_point, budget, capacity,
+                         big_m=10000, force_skip_above=True, units_per_order=UNITS_PER_ORDER):
+    # With non-negative costs the model only minimises cost, so the optimum is
+    # exactly the forced set (stock below reorder point) if it fits, else infeasible.
+    # force_skip_above rows x <= 1 - (stock - rp - 1)/big_m below 0 are infeasible too.
+    # Returns None when the shortcut does not apply.
+    cost = np.asarray(cost, dtype=float)
+    if (cost < 0).any():
+        return None
+    stock = np.asarray(stock, dtype=float)
+    reorder_point = np.asarray(reorder_point, dtype=float)
+    lower = np.maximum(0.0, (reorder_point - stock) / big_m)
+    forced = lower > 0
+    fits = (not (lower > 1).any()
+            and not (force_skip_above and ((stock - reorder_point - 1) / big_m > 1).any())
+            and cost[forced].sum() <= budget
+            and units_per_order * forced.sum() <= capacity)
+    if not fits:
+        return ReorderResult(np.zeros(len(cost), dtype=int), pulp.LpStatusInfeasible, 'closed_form')
+    return ReorderResult(forced.astype(int), pulp.LpStatusOptimal, 'closed_form')
+
+
+def optimize_reorders(df, settings, big_m=10000, force_skip_above=True, fast_path=True):
+    cost = df['reorder_cost'].to_numpy()
+    stock = df['stock'].to_numpy()
+    reorder_point = df['reorder_point'].to_numpy()
+    budget, capacity = settings['budget'], settings['warehouse_capacity']
+
+    result = None
+    if fast_path:
+        result = closed_form_reorders(cost, stock, reorder_point, budget, capacity,
+                                      big_m=big_m, force_skip_above=force_skip_above)
+    if result is None:
+        result = solve_cbc(cost, stock, reorder_point, budget, capacity,
+                           big_m=big_m, force_skip_above=force_skip_above)
+    solve_path_counts[result.path] += 1
+    observe_solve(result)
+    return result
+
+
+# ---- Delta re-optimisation ----
+class DeltaOptimizer:
+    """Keeps the last inputs, solution and PuLP model; re-optimises only what changed."""
+
+    def __init__(self, big_m=10000, force_skip_above=True, units_per_order=UNITS_PER_ORDER):
+        self.big_m = big_m
+        self.force_skip_above = force_skip_above
+        self.units_per_order = units_per_order
+        self.product_ids = None
+        self.inputs = None       # (cost, stock, reorder_point) the result was computed for
+        self.limits = None       # (budget, capacity)
+        self.result = None
+        self.prob = self.reorder = None   # built on the first CBC solve
+        self._dirty = set()      # rows whose model coefficients are out of date
+
+    def _forced(self, stock, reorder_point):
+        return reorder_point > stock
+
+    def _skipped(self, stock, reorder_point):
+        # Binary x <= upper < 1 means x = 0
+        if not self.force_skip_above:
+            return np.zeros(len(stock), dtype=bool)
+        return stock - reorder_point - 1 > 0
+
+    def update(self, product_ids, cost, stock, reorder_point, budget, capacity, solve=True):
+        # Returns a ReorderResult, or None when a CBC solve is needed and solve=False
+        product_ids = list(product_ids)
+        # Copies: the caller may mutate its arrays, and we diff against these later
+        cost, stock, reorder_point = (np.array(a, dtype=float) for a in (cost, stock, reorder_point))
+
+        if self.result is None or product_ids != self.product_ids:
+            return self._full(product_ids, cost, stock, reorder_point, budget, capacity, solve)
+
+        old_cost, old_stock, old_rp = self.inputs
+        changed = np.flatnonzero((cost != old_cost) | (stock != old_stock) | (reorder_point != old_rp))
+        limits = (float(budget), float(capacity))
+        if not len(changed) and limits == self.limits:
+            return self.result
+
+        # Non-negative costs: the optimum is the forced set, O(n) vectorised
+        fast = closed_form_reorders(cost, stock, reorder_point, budget, capacity,
+                                    big_m=self.big_m, force_skip_above=self.force_skip_above,
+                                    units_per_order=self.units_per_order)
+        if fast is not None:
+            self._dirty.update(changed.tolist())
+            return self._keep(product_ids, cost, stock, reorder_point, limits, fast)
+
+        if self._still_optimal(changed, cost, stock, reorder_point, limits):
+            self._dirty.update(changed.tolist())
+            result = ReorderResult(self.result.decisions, pulp.LpStatusOptimal, 'delta')
+            return self._keep(product_ids, cost, stock, reorder_point, limits, result)
+
+        if not solve:
+            return None
+        self._dirty.update(changed.tolist())
+        return self._resolve(product_ids, cost, stock, reorder_point, limits)
+
+    def _still_optimal(self, changed, cost, stock, reorder_point, limits):
+        # Sufficient conditions for the previous optimum to stay optimal, using
+        # that the budget row has the same coefficients as the objective
+        if self.result.status != pulp.LpStatusOptimal:
+            return False
+        x = self.result.decisions
+        budget, capacity = limits
+        old_budget, old_capacity = self.limits
+        if cost @ x > budget or self.units_per_order * x.sum() > capacity:
+            return False
+        # Looser limits could admit a cheaper plan
+        if budget > old_budget or capacity > old_capacity:
+            return False
+        old_cost, old_stock, old_rp = self.inputs
+        forced = self._forced(stock[changed], reorder_point[changed])
+        was_forced = self._forced(old_stock[changed], old_rp[changed])
+        skipped = self._skipped(stock[changed], reorder_point[changed])
+        if ((reorder_point[changed] - stock[changed]) / self.big_m > 1).any():
+            return False
+        if self.force_skip_above and ((stock[changed] - reorder_point[changed] - 1) / self.big_m > 1).any():
+            return False
+        xc, new, old = x[changed], cost[changed], old_cost[changed]
+        feasible = np.where(xc == 1, ~skipped, ~forced)
+        # x=1 stays optimal if the product is forced now, or was chosen freely and
+        # got no dearer; x=0 stays optimal while ordering it can only add cost
+        optimal = np.where(xc == 1, forced | (~was_forced & (new <= old)), new >= 0)
+        return bool((feasible & optimal).all())
+
+    def _keep(self, product_ids, cost, stock, reorder_point, limits, result):
+        self.product_ids = product_ids
+        self.inputs = (cost, stock, reorder_point)
+        self.limits = limits
+        self.result = result
+        return result
+
+    def _full(self, product_ids, cost, stock, reorder_point, budget, capacity, solve):
+        limits = (float(budget), float(capacity))
+        self.prob = self.reorder = None
+        self._dirty.clear()
+        result = closed_form_reorders(cost, stock, reorder_point, budget, capacity,
+                                      big_m=self.big_m, force_skip_above=self.force_skip_above,
+                                      units_per_order=self.units_per_order)
+        if result is None:
+            if not solve:
+                self.result = None
+                return None
+            return self._resolve(product_ids, cost, stock, reorder_point, limits)
+        return self._keep(product_ids, cost, stock, reorder_point, limits, result)
+
+    def _resolve(self, product_ids, cost, stock, reorder_point, limits):
+        start = time.perf_counter()
+        warm = None
+        if self.prob is None or len(self.reorder) != len(cost):
+            self.prob, self.reorder = build_reorder_model(
+                cost, stock, reorder_point, *limits, big_m=self.big_m,
+                force_skip_above=self.force_skip_above, units_per_order=self.units_per_order)
+            self._dirty.clear()
+        else:
+            self._patch(cost, stock, reorder_point, limits)
+            if self.result is not None and self.result.status == pulp.LpStatusOptimal:
+                warm = self.result.decisions
+        built = time.perf_counter()
+        decisions, status = solve_reorder_model(self.prob, self.reorder, warm_start=warm)
+        stats = {'variables': self.prob.numVariables(), 'constraints': self.prob.numConstraints(),
+                 'model_build_seconds': built - start, 'solve_seconds': time.perf_counter() - built,
+                 'rows_updated': len(self._dirty) if warm is not None else len(cost)}
+        self._dirty.clear()
+        return self._keep(product_ids, cost, stock, reorder_point, limits,
+                          ReorderResult(decisions, status, 'cbc', stats))
+
+    def _patch(self, cost, stock, reorder_point, limits):
+        # Rewrite only the coefficients and bound rows of products that changed
+        prob, reorder = self.prob, self.reorder
+        prob.constraints['budget'].changeRHS(limits[0])
+        prob.constraints['capacity'].changeRHS(limits[1])
+        for i in sorted(self._dirty):
+            var = reorder[i]
+            prob.objective[var] = cost[i]
+            prob.constraints['budget'][var] = cost[i]
+            prob.constraints.pop(f'force_{i}', None)
+            prob.constraints.pop(f'skip_{i}', None)
+            lower = max(0.0, (reorder_point[i] - stock[i]) / self.big_m)
+            if lower > 0:
+                prob += var >= lower, f'force_{i}'
+            if self.force_skip_above:
+                upper = min(1.0, 1 - max(0.0, (stock[i] - reorder_point[i] - 1) / self.big_m))
+                if upper < 1:
+                    prob += var <= upper, f'skip_{i}'
+
+    def accept(self, product_ids, cost, stock, reorder_point, budget, capacity, result):
+        # Adopt a solution computed elsewhere (e.g. on the worker pool) for these inputs
+        self.prob = self.reorder = None
+        self._dirty.clear()
+        cost, stock, reorder_point = (np.array(a, dtype=float) for a in (cost, stock, reorder_point))
+        return self._keep(list(product_ids), cost, stock, reorder_point,
+                          (float(budget), float(capacity)), result)
+
+
+def load_and_optimize():
+    # (optimised inventory, stock chart, cost chart); the pipeline lives in service.py
+    from service import load_and_optimize
+    return load_and_optimize()
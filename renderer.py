@@ -0,0 +1,147 @@
+# renderer.py
+import atexit
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from metrics import stage_seconds
+
+
+class ImageRenderer:
+    """Writes static figure exports from a background thread with a bounded queue."""
+
+    def __init__(self, maxsize=8):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._written = {}   # path -> content hash of the image on disk
+        self._queued = {}    # path -> content hash (or deferred token) waiting in the queue
+        self._written_tokens = {}  # path -> token of the deferred build on disk
+        self.rendered = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+        # Flush queued exports on interpreter exit so CLI runs still produce their images
+        atexit.register(self.join)
+
+    def submit(self, fig, path):
+        # The path carries the date folder, so an unchanged figure is rendered once per day
+        digest = hashlib.sha256(fig.to_json().encode()).hexdigest()
+        with self._lock:
+            if digest in (self._written.get(path), self._queued.get(path)):
+                self.skipped += 1
+                return False
+            self._ensure_worker()
+            try:
+                self._queue.put_nowait((fig, path, digest))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._queued[path] = digest
+        return True
+
+    def submit_deferred(self, token, build, paths):
+        # build() -> figures for paths, run on the render thread so the caller does
+        # not pay for building them; token identifies the content (e.g. a data version)
+        with self._lock:
+            if all(token in (self._written_tokens.get(p), self._queued.get(p)) for p in paths):
+                self.skipped += len(paths)
+                return False
+            self._ensure_worker()
+            try:
+                self._queue.put_nowait((build, tuple(paths), token))
+            except queue.Full:
+                self.dropped += len(paths)
+                return False
+            for p in paths:
+                self._queued[p] = token
+        return True
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='image-renderer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item, target, key = self._queue.get()
+            try:
+                if callable(item):
+                    self._render_deferred(item, target, key)
+                else:
+                    self._render(item, target, key)
+            finally:
+                self._queue.task_done()
+
+    def _render_deferred(self, build, paths, token):
+        start = time.perf_counter()
+        try:
+            figs = build()
+        except Exception:
+            with self._lock:
+                self.failed += len(paths)
+                for p in paths:
+                    self._forget(p, token)
+            return
+        stage_seconds.observe(time.perf_counter() - start, stage='export_figures')
+        for fig, path in zip(figs, paths):
+            digest = hashlib.sha256(fig.to_json().encode()).hexdigest()
+            with self._lock:
+                unchanged = self._written.get(path) == digest
+                if unchanged:
+                    self.skipped += 1
+            written = unchanged or self._render(fig, path, digest)
+            with self._lock:
+                if written:
+                    self._written_tokens[path] = token
+                self._forget(path, token)
+
+    def _render(self, fig, path, digest):
+        start = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fig.write_image(path)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+                self._forget(path, digest)
+            return False
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage='png_export')
+        with self._lock:
+            self.rendered += 1
+            self.last_latency = elapsed
+            self.total_latency += elapsed
+            self._written[path] = digest
+            self._forget(path, digest)
+        return True
+
+    def _forget(self, path, token):
+        # Under self._lock; a newer submission queued for the same path stays
+        if self._queued.get(path) == token:
+            del self._queued[path]
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def join(self):
+        self._queue.join()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'rendered': self.rendered,
+                'skipped': self.skipped,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'last_latency_seconds': self.last_latency,
+                'avg_latency_seconds': self.total_latency / self.rendered if self.rendered else 0.0,
+            }
+
+
+image_renderer = ImageRenderer(maxsize=int(os.getenv('RENDER_QUEUE_SIZE', '8')))
@@ -0,0 +1,207 @@
+# replenishment.py
+# Multi-warehouse, multi-period replenishment plan.
+#
+# For every product, warehouse and day of the horizon the model decides an
+# order quantity q (k units) and whether an order is placed at all (y):
+#   q[p,w,t] <= max_order_qty * y[p,w,t]
+#   sum_p q[p,w,t] <= capacity_w                      (daily inbound capacity)
+#   stock_p + arrivals_p(<=t) + short[p,t] >= demand_p*(t+1) + safety_p
+#   sum reorder_cost_p * y <= budget
+# minimising order cost plus a penalty on projected shortages. Orders arrive
+# after lead_time days, so orders that cannot land inside the horizon are not
+# modelled. The model is kept between calls: only products whose data changed
+# are rebuilt, and CBC is warm-started from the previous solution.
+import math
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+import pulp
+
+from optimizer import UNITS_PER_ORDER
+
+PRODUCT_FIELDS = ['stock', 'demand_rate', 'lead_time', 'reorder_cost', 'safety_stock']
+
+DEFAULTS = {
+    'horizon_days': 7,
+    'max_order_qty': UNITS_PER_ORDER,
+    'shortage_penalty': 1000,
+    'solver_time_limit': 10,    # seconds
+    'solver_mip_gap': 0.01,     # relative
+}
+
+PlanResult = namedtuple('PlanResult', ['status', 'plan', 'objective', 'solve_seconds', 'warm_start'])
+
+
+def planning_settings(settings):
+    s = dict(DEFAULTS)
+    s.update({k: v for k, v in settings.items() if k in DEFAULTS or k in ('budget', 'warehouses')})
+    # A single warehouse with the global capacity when none are configured
+    if not s.get('warehouses'):
+        s['warehouses'] = [{'name': 'main', 'capacity': settings.get('warehouse_capacity', 1000)}]
+    s.setdefault('budget', settings.get('budget', 1000))
+    return s
+
+
+class ReplenishmentModel:
+
+    def __init__(self, settings):
+        self.settings = planning_settings(settings)
+        self.horizon = int(self.settings['horizon_days'])
+        self.warehouses = [w['name'] for w in self.settings['warehouses']]
+        self.prob = pulp.LpProblem('Replenishment', pulp.LpMinimize)
+        self.prob += pulp.LpAffineExpression()
+        self.prob += pulp.LpAffineExpression() <= self.settings['budget'], 'budget'
+        for wi, w in enumerate(self.settings['warehouses']):
+            for t in range(self.horizon):
+                self.prob += pulp.LpAffineExpression() <= w['capacity'], f'cap_{wi}_{t}'
+        self._blocks = {}   # product_id -> block dict
+        self._next_id = 0
+        self._stale_vars = False
+        self.solved = False
+
+    def structure(self):
+        # Settings that change the model shape; anything else is updated in place
+        return (self.horizon, tuple(self.warehouses))
+
+    # ---- incremental updates ----
+    def update_settings(self, settings):
+        s = planning_settings(settings)
+        self.prob.constraints['budget'].changeRHS(s['budget'])
+        for wi, w in enumerate(s['warehouses']):
+            for t in range(self.horizon):
+                self.prob.constraints[f'cap_{wi}_{t}'].changeRHS(w['capacity'])
+        if s['max_order_qty'] != self.settings['max_order_qty']:
+            cons = self.prob.constraints
+            for block in self._blocks.values():
+                for (wi, t), (q, y) in block['orders'].items():
+                    q.upBound = s['max_order_qty']
+                    cons[f"link_{block['idx']}_{wi}_{t}"][y] = -s['max_order_qty']
+        if s['shortage_penalty'] != self.settings['shortage_penalty']:
+            for block in self._blocks.values():
+                for v in block['short']:
+                    self.prob.objective[v] = s['shortage_penalty']
+        self.settings = s
+
+    def sync(self, df):
+        # Bring the model in line with df; returns the number of products rebuilt
+        rows = df.set_index('product_id')[PRODUCT_FIELDS]
+        rows = rows[~rows.index.duplicated(keep='last')]
+        for pid in set(self._blocks) - set(rows.index):
+            self._remove(pid)
+        rebuilt = 0
+        for pid, values in zip(rows.index, rows.itertuples(index=False, name=None)):
+            values = tuple(float(v) for v in values)
+            block = self._blocks.get(pid)
+            if block is not None and block['values'] == values:
+                continue
+            if block is not None:
+                self._remove(pid)
+            self._add(pid, values)
+            rebuilt += 1
+        return rebuilt
+
+    def _add(self, pid, values):
+        stock, demand, lead_time, cost, safety = values
+        idx = self._next_id
+        self._next_id += 1
+        lead = max(0, math.ceil(lead_time))
+        max_qty = self.settings['max_order_qty']
+        penalty = self.settings['shortage_penalty']
+        cons = self.prob.constraints
+
+        block = {'idx': idx, 'values': values, 'orders': {}, 'short': [], 'names': []}
+        for wi in range(len(self.warehouses)):
+            for t in range(max(0, self.horizon - lead)):
+                q = pulp.LpVariable(f'q_{idx}_{wi}_{t}', lowBound=0, upBound=max_qty)
+                y = pulp.LpVariable(f'y_{idx}_{wi}_{t}', cat='Binary')
+                block['orders'][(wi, t)] = (q, y)
+                name = f'link_{idx}_{wi}_{t}'
+                self.prob += q - max_qty * y <= 0, name
+                block['names'].append(name)
+                cons[f'cap_{wi}_{t}'][q] = 1
+                cons['budget'][y] = cost
+                self.prob.objective[y] = cost
+
+        for t in range(self.horizon):
+            short = pulp.LpVariable(f's_{idx}_{t}', lowBound=0)
+            block['short'].append(short)
+            self.prob.objective[short] = penalty
+            arrivals = [q for (_, s), (q, _) in block['orders'].items() if s + lead <= t]
+            name = f'bal_{idx}_{t}'
+            self.prob += (pulp.lpSum(arrivals) + short >= demand * (t + 1) + safety - stock), name
+            block['names'].append(name)
+        self._blocks[pid] = block
+
+    def _remove(self, pid):
+        block = self._blocks.pop(pid)
+        cons = self.prob.constraints
+        for name in block['names']:
+            del cons[name]
+        for (wi, t), (q, y) in block['orders'].items():
+            cons[f'cap_{wi}_{t}'].pop(q, None)
+            cons['budget'].pop(y, None)
+            self.prob.objective.pop(y, None)
+        for short in block['short']:
+            self.prob.objective.pop(short, None)
+        self._stale_vars = True
+
+    # ---- solve ----
+    def solve(self):
+        if self._stale_vars:
+            # LpProblem caches every variable it has seen; drop removed ones
+            # so they are not written as empty columns
+            self.prob._variables = []
+            self.prob._variable_ids = {}
+            self._stale_vars = False
+        warm = self.solved
+        solver = pulp.PULP_CBC_CMD(msg=False, warmStart=warm,
+                                   timeLimit=self.settings['solver_time_limit'],
+                                   gapRel=self.settings['solver_mip_gap'])
+        start = time.perf_counter()
+        status = self.prob.solve(solver)
+        elapsed = time.perf_counter() - start
+        self.solved = status == pulp.LpStatusOptimal or self.prob.sol_status in (
+            pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+        return PlanResult(status, self.plan(), pulp.value(self.prob.objective), elapsed, warm)
+
+    def plan(self):
+        records = []
+        for pid, block in self._blocks.items():
+            for (wi, t), (q, y) in block['orders'].items():
+                qty = q.varValue or 0
+                if (y.varValue or 0) > 0.5 and qty > 1e-6:
+                    records.append({'product_id': pid, 'warehouse': self.warehouses[wi],
+                                    'day': t, 'quantity': qty})
+        return pd.DataFrame(records, columns=['product_id', 'warehouse', 'day', 'quantity'])
+
+
+# One model per process, reused for warm starts while its shape stays the same
+_model = None
+_model_lock = threading.Lock()
+
+
+def plan_replenishment(df=None, settings=None):
+    global _model
+    from utils import load_data, load_settings
+    df = load_data() if df is None else df
+    settings = load_settings() if settings is None else settings
+    if df is None or df.empty:
+        return PlanResult(pulp.LpStatusNotSolved, pd.DataFrame(), None, 0.0, False)
+
+    with _model_lock:
+        candidate = ReplenishmentModel(settings)
+        if _model is None or _model.structure() != candidate.structure():
+            _model = candidate
+        else:
+            _model.update_settings(settings)
+        _model.sync(df)
+        return _model.solve()
+
+
+if __name__ == '__main__':
+    result = plan_replenishment()
+    print(f"status={pulp.LpStatus[result.status]} objective={result.objective} "
+          f"solve={result.solve_seconds:.2f}s orders={len(result.plan)}")
+    result.plan.to_csv('data/output/replenishment_plan.csv', index=False)
@@ -0,0 +1,127 @@
+# scenarios.py
+# Budget / warehouse-capacity sweeps over the reorder optimisation.
+#
+# Usage:
+#   python scenarios.py --budgets 500:3000:250 --capacities 200,500,1000
+# Writes scenarios.csv, frontier.csv and frontier.html to data/output/scenarios/.
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pulp
+
+from optimizer import (BIG_M, FORCE_SKIP_ABOVE, UNITS_PER_ORDER, build_reorder_model, closed_form_reorders,
+                       solve_reorder_model)
+
+OUTPUT_DIR = 'data/output/scenarios'
+
+# Coefficient arrays shared by every scenario, set once per worker process
+_inputs = None
+
+
+def _init_worker(cost, stock, reorder_point, big_m, force_skip_above):
+    global _inputs
+    _inputs = (cost, stock, reorder_point, big_m, force_skip_above)
+
+
+def _solve_scenario(scenario):
+    budget, capacity = scenario
+    cost, stock, reorder_point, big_m, force_skip_above = _inputs
+    result = closed_form_reorders(cost, stock, reorder_point, budget, capacity,
+                                  big_m=big_m, force_skip_above=force_skip_above)
+    path = 'closed_form'
+    if result is None:
+        prob, reorder = build_reorder_model(cost, stock, reorder_point, budget, capacity,
+                                            big_m=big_m, force_skip_above=force_skip_above)
+        decisions, status = solve_reorder_model(prob, reorder)
+        path = 'cbc'
+    else:
+        decisions, status = result.decisions, result.status
+    feasible = status == pulp.LpStatusOptimal
+    return {
+        'budget': budget,
+        'warehouse_capacity': capacity,
+        'status': pulp.LpStatus[status],
+        'feasible': feasible,
+        'orders': int(decisions.sum()),
+        'total_cost': float(cost @ decisions) if feasible else np.nan,
+        'units': int(decisions.sum()) * UNITS_PER_ORDER,
+        'path': path,
+    }
+
+
+def run_scenarios(df, budgets, capacities, workers=None, big_m=BIG_M, force_skip_above=FORCE_SKIP_ABOVE):
+    # Same model as the dashboard by default, so a scenario at the current settings matches it
+    df = df.copy()
+    if 'reorder_point' not in df.columns:
+        df['reorder_point'] = df['demand_rate'] * df['lead_time'] + df['safety_stock']
+    # Coefficients are extracted once and handed to each worker at start-up, not per task
+    initargs = (df['reorder_cost'].to_numpy(dtype=float), df['stock'].to_numpy(dtype=float),
+                df['reorder_point'].to_numpy(dtype=float), big_m, force_skip_above)
+    grid = list(itertools.product(budgets, capacities))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(*initargs)
+        rows = [_solve_scenario(s) for s in grid]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as ex:
+            rows = list(ex.map(_solve_scenario, grid, chunksize=max(1, len(grid) // (workers * 4))))
+    return pd.DataFrame(rows)
+
+
+def frontier(results):
+    # Cheapest feasible plan per budget, across all capacities
+    feasible = results[results['feasible']]
+    best = feasible.sort_values('total_cost').groupby('budget', as_index=False).first()
+    return (pd.DataFrame({'budget': sorted(results['budget'].unique())})
+              .merge(best[['budget', 'warehouse_capacity', 'total_cost', 'orders']], on='budget', how='left'))
+
+
+def frontier_figure(results):
+    # The colour column lives in the sorted frame, so every point keeps its own capacity
+    data = results.sort_values('budget').assign(capacity=lambda d: d['warehouse_capacity'].astype(str))
+    fig = px.line(data, x='budget', y='total_cost', color='capacity', markers=True,
+                  title='Reorder Cost vs Budget by Warehouse Capacity',
+                  labels={'capacity': 'Warehouse capacity', 'total_cost': 'Reorder cost (000s USD)',
+                          'budget': 'Budget (000s USD)'})
+    return fig
+
+
+def parse_values(spec):
+    # '500,1000,1500' or an inclusive range 'start:stop:step'
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        return list(np.arange(start, stop + step / 2, step))
+    return [float(x) for x in spec.split(',')]
+
+
+def main(argv=None):
+    from forecast import SERVICE_LEVEL, apply_forecast
+    from utils import load_data, load_forecast, load_settings
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description='Solve a grid of budget/capacity scenarios.')
+    parser.add_argument('--budgets', default=str(settings['budget']))
+    parser.add_argument('--capacities', default=str(settings['warehouse_capacity']))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    df = load_data()
+    if df is None or df.empty:
+        parser.error('no inventory data')
+    df = apply_forecast(df, load_forecast(), settings.get('service_level', SERVICE_LEVEL))
+    results = run_scenarios(df, parse_values(args.budgets), parse_values(args.capacities), args.workers)
+
+    os.makedirs(args.out, exist_ok=True)
+    results.to_csv(os.path.join(args.out, 'scenarios.csv'), index=False)
+    frontier(results).to_csv(os.path.join(args.out, 'frontier.csv'), index=False)
+    frontier_figure(results).write_html(os.path.join(args.out, 'frontier.html'))
+    print(frontier(results).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
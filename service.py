@@ -0,0 +1,171 @@
+# --------------------------------------------------------------
+# service.py
+# The one place that loads inventory, optimises reorders and builds figures.
+# Both web apps (supply_chain_dashboard.py via dashboard_app.py, and app.py)
+# are views over it and share its result cache and the solver pool, so
+# concurrent users of either app share one computation per data version.
+# Imported lazily: it pulls in pandas, Plotly and PuLP.
+# --------------------------------------------------------------
+import json
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+import plotly.express as px
+import pandas as pd
+from utils import (load_data, load_settings, load_forecast, describe_products, inventory_version,
+                   demand_version)
+from inventory_store import COLUMNS as INVENTORY_COLUMNS
+from ingest import DASHBOARD_COLUMNS, add_reorder_point
+from solver_service import solver_service
+from cache import ResultCache, SharedCache, content_key
+from renderer import image_renderer
+from figures import detail_figures, view_figures
+from forecast import SERVICE_LEVEL, apply_forecast
+from snapshots import write_snapshot, apply_retention
+from metrics import timed
+# Every caller solves this one formulation, so they share solver results
+from optimizer import BIG_M, FORCE_SKIP_ABOVE
+
+# ------------------ Result cache ------------------
+# Keyed on the inventory + settings content; set RESULT_CACHE_PATH to keep it across restarts
+result_cache = ResultCache(maxsize=int(os.getenv('RESULT_CACHE_SIZE', '16')),
+                           persist_path=os.getenv('RESULT_CACHE_PATH'))
+
+# Figures per (results key, view, group, drill): many more entries than results,
+# so they get their own bound and cannot evict the results they are built from
+figure_cache = ResultCache(maxsize=int(os.getenv('FIGURE_CACHE_SIZE', '64')))
+
+# Set SHARED_CACHE_PATH (wsgi.py does) when several worker processes serve the
+# apps: results are then shared through it and computed by one process only
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH')
+shared_cache = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
+shared_figures = SharedCache(SHARED_CACHE_PATH, maxsize=256, table='figures') if SHARED_CACHE_PATH else None
+
+OUTPUT_COLUMNS = INVENTORY_COLUMNS + ['reorder_point', 'should_reorder']
+
+# key -> lock held while that key is being computed
+_building = {}
+_building_lock = threading.Lock()
+
+
+def _lookup(key, local, remote):
+    cached = local.get(key)
+    if cached is None and remote is not None:
+        cached = remote.get(key)
+        if cached is not None:
+            local.put(key, cached)
+    return cached
+
+
+def shared(key, compute, local=result_cache, remote=shared_cache):
+    # Cached value for key, or compute() -> (value, cacheable). Concurrent callers
+    # for the same key, in this process or (with a remote cache) in other workers,
+    # wait for the first one instead of repeating the work.
+    cached = _lookup(key, local, remote)
+    if cached is not None:
+        return cached
+    with _building_lock:
+        lock = _building.setdefault(key, threading.Lock())
+    try:
+        with lock, (remote.lock(key) if remote is not None else nullcontext()):
+            cached = _lookup(key, local, remote)
+            if cached is None:
+                value, cacheable = compute()
+                if cacheable:
+                    local.put(key, value)
+                    if remote is not None:
+                        remote.put(key, value)
+                cached = value
+    finally:
+        with _building_lock:
+            _building.pop(key, None)
+    return cached
+
+
+def results_key():
+    # Version numbers and the (already parsed) settings; no input file is reread
+    settings = json.dumps(load_settings(), sort_keys=True)
+    return content_key(token=f'{inventory_version()}/{demand_version()}/{settings}')
+
+
+def with_text_columns(df):
+    text = load_data(['product_id', 'product_name', 'description'])
+    return text.merge(df, on='product_id', how='right').reindex(columns=OUTPUT_COLUMNS)
+
+# ------------------ Results & figures ------------------
+def build_results():
+    # Optimised inventory for the current data/settings; exports run only on a cache miss
+    key = results_key()
+    df = shared(key, lambda: _compute_results(key))
+    return df.copy(), key
+
+def _compute_results(key):
+    # Only the columns the optimiser and charts need; text is looked up per view
+    with timed('load', pipeline='dashboard'):
+        df = load_data(DASHBOARD_COLUMNS)
+    if df is None or df.empty:
+        return pd.DataFrame(), False
+
+    # ---- Settings ----
+    settings = load_settings()
+
+    # ---- Demand forecast (only products with daily history) ----
+    with timed('forecast', pipeline='dashboard'):
+        df = apply_forecast(df, load_forecast(), settings.get('service_level', SERVICE_LEVEL))
+
+    # ---- Reorder point ----
+    with timed('reorder_point', pipeline='dashboard'):
+        df = add_reorder_point(df)
+
+    # ---- PuLP optimisation ----
+    with timed('optimize', pipeline='dashboard'):
+        solve = solver_service.request(df, settings, big_m=BIG_M, force_skip_above=FORCE_SKIP_ABOVE,
+                                       channel='dashboard')
+    df['should_reorder'] = solve.decisions_for(df['product_id'])
+    df.attrs['solve_path'] = solve.result.path
+    df.attrs['solve_pending'] = solve.pending
+
+    # ---- Save static images (figures are built and rendered in the background) ----
+    today = datetime.now().strftime('%Y-%m-%d')
+    out = f'data/images/outputdashboards/{today}'
+    if not solve.pending:
+        frame = df.copy()
+        image_renderer.submit_deferred(key, lambda: detail_figures(frame, describe=describe_products),
+                                       [f'{out}/inventory_dashboard.png', f'{out}/cost-to-reorder.png'])
+    # ---- Columnar snapshot, only when the decisions changed ----
+    with timed('snapshot', pipeline='dashboard'):
+        if not solve.pending and write_snapshot(df, enrich=with_text_columns):
+            apply_retention(settings)
+
+    # Only cache answers computed from the current inputs
+    return df, not solve.pending
+
+def build_figures(view='detail', group_by='purpose', drill=None):
+    df, key = build_results()
+    if df.empty:
+        empty = px.bar(title='No inventory data')
+        return empty, empty, df
+
+    def compute():
+        with timed('figures', pipeline='dashboard', view=view):
+            figures = view_figures(df, view, group_by, drill, describe=describe_products)
+        return figures, not df.attrs.get('solve_pending')
+
+    if df.attrs.get('solve_pending'):
+        fig1, fig2, resolved = compute()[0]
+    else:
+        fig1, fig2, resolved = shared((key, view, group_by, drill), compute, figure_cache, shared_figures)
+    df.attrs['view'] = resolved
+    return fig1, fig2, df
+
+def load_and_optimize():
+    # The full optimised inventory (text columns included) and the two detail charts
+    df, _ = build_results()
+    if df.empty:
+        empty = px.bar(title='No Data Available')
+        return pd.DataFrame(columns=OUTPUT_COLUMNS), empty, empty
+    full = with_text_columns(df)
+    full.attrs.update(df.attrs)
+    fig1, fig2 = detail_figures(full)
+    return full, fig1, fig2
@@ -0,0 +1,166 @@
+# snapshots.py
+# Versioned, columnar (Arrow IPC) snapshots of the reorder decisions.
+#
+# Layout:
+#   data/output/snapshots/<date>/inventory_dashboard-<time>-<digest>.arrow
+#   data/output/snapshots/CURRENT   -> JSON pointer to the latest snapshot
+# Files are uncompressed Arrow IPC so readers can memory-map them. Both the
+# snapshot and the pointer are written to a unique temp file and renamed into
+# place, so several worker processes can write at once.
+#
+# Usage:
+#   python snapshots.py                 # print the current snapshot
+#   python snapshots.py --export-csv    # write it to data/output/inventory_dashboard.csv
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from atomicfile import atomic_write
+
+
+SNAPSHOT_DIR = 'data/output/snapshots'
+IMAGE_DIR = 'data/images/outputdashboards'
+CSV_PATH = 'data/output/inventory_dashboard.csv'
+
+SNAPSHOT_RETENTION = 20      # snapshot files kept
+IMAGE_RETENTION_DAYS = 30    # dated image folders kept
+
+
+def decisions_digest(df):
+    # Identifies the decision set: which products are reordered
+    h = hashlib.sha256()
+    h.update('\0'.join(map(str, df['product_id'])).encode())
+    h.update(df['should_reorder'].to_numpy(dtype='int8').tobytes())
+    return h.hexdigest()
+
+
+def _pointer_path(directory):
+    return os.path.join(directory, 'CURRENT')
+
+
+def current_snapshot(directory=SNAPSHOT_DIR):
+    # {'path', 'digest', 'created', 'rows'} or None
+    try:
+        with open(_pointer_path(directory)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_snapshot(df, directory=SNAPSHOT_DIR, enrich=None):
+    # Writes a new snapshot only when the decisions differ from the current one.
+    # enrich(df) -> df is applied just before writing (e.g. to add text columns).
+    # Returns the new pointer, or None when nothing changed.
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    digest = decisions_digest(df)
+    current = current_snapshot(directory)
+    if current is not None and current.get('digest') == digest and os.path.exists(current['path']):
+        return None
+
+    if enrich is not None:
+        df = enrich(df)
+    now = datetime.now()
+    folder = os.path.join(directory, now.strftime('%Y-%m-%d'))
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"inventory_dashboard-{now.strftime('%H%M%S%f')}-{digest[:12]}.arrow")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with atomic_write(path, 'wb') as f:
+        feather.write_feather(table, f, compression='uncompressed')
+
+    pointer = {'path': path, 'digest': digest, 'created': now.isoformat(timespec='seconds'),
+               'rows': len(df)}
+    with atomic_write(_pointer_path(directory)) as f:
+        json.dump(pointer, f)
+    return pointer
+
+
+def read_snapshot(path=None, directory=SNAPSHOT_DIR, columns=None):
+    # Memory-mapped, zero-copy pyarrow.Table of a snapshot (current one by default)
+    import pyarrow as pa
+    if path is None:
+        current = current_snapshot(directory)
+        if current is None:
+            return None
+        path = current['path']
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def load_snapshot_frame(path=None, directory=SNAPSHOT_DIR, columns=None):
+    table = read_snapshot(path, directory, columns)
+    return None if table is None else table.to_pandas()
+
+
+# ---- retention ----
+def prune_snapshots(directory=SNAPSHOT_DIR, keep=SNAPSHOT_RETENTION):
+    # Other worker processes may prune (or write) at the same time: files that
+    # vanish under us are skipped, folders that gain a file are kept
+    current = (current_snapshot(directory) or {}).get('path')
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith('.arrow'):
+                path = os.path.join(root, name)
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    continue
+    files.sort(reverse=True)
+    removed = 0
+    for _, path in files[keep:]:
+        if path != current:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+    for root, dirs, names in os.walk(directory, topdown=False):
+        if root != directory and not dirs and not names:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+    return removed
+
+
+def prune_image_folders(root=IMAGE_DIR, keep_days=IMAGE_RETENTION_DAYS, today=None):
+    # Removes data/images/outputdashboards/<YYYY-MM-DD> folders older than keep_days
+    if not os.path.isdir(root):
+        return []
+    cutoff = (today or datetime.now()).date() - timedelta(days=keep_days)
+    removed = []
+    for name in os.listdir(root):
+        try:
+            day = datetime.strptime(name, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        if day < cutoff:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+def apply_retention(settings):
+    prune_snapshots(keep=int(settings.get('snapshot_retention', SNAPSHOT_RETENTION)))
+    prune_image_folders(keep_days=int(settings.get('image_retention_days', IMAGE_RETENTION_DAYS)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect or export the current decision snapshot.')
+    parser.add_argument('--export-csv', nargs='?', const=CSV_PATH, default=None, metavar='PATH')
+    args = parser.parse_args()
+    pointer = current_snapshot()
+    if pointer is None:
+        parser.exit(1, 'no snapshot yet\n')
+    print(json.dumps(pointer, indent=2))
+    if args.export_csv:
+        frame = load_snapshot_frame(pointer['path'])
+        with atomic_write(args.export_csv, newline='') as f:
+            frame.to_csv(f, index=False)
+        print(f'wrote {args.export_csv}')
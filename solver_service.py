@@ -0,0 +1,155 @@
+# solver_service.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from metrics import observe_solve
+from optimizer import DeltaOptimizer, solve_path_counts
+
+# Per worker process: the last model per formulation, patched and warm-started
+# when the same worker gets the next job for it
+_worker_models = {}
+
+
+def _solve_job(product_ids, cost, stock, reorder_point, budget, capacity, big_m, force_skip_above, model_key):
+    # Runs in a worker process, so it must stay a picklable top-level function
+    delta = _worker_models.get(model_key)
+    if delta is None:
+        delta = _worker_models[model_key] = DeltaOptimizer(big_m=big_m, force_skip_above=force_skip_above)
+    return delta.update(product_ids, cost, stock, reorder_point, budget, capacity)
+
+
+class SolveStatus(namedtuple('SolveStatus', ['result', 'product_ids', 'pending', 'fresh'])):
+    # result/product_ids: last completed solve for this formulation (None if none yet)
+    # pending: a solve for the current inputs is still running
+    # fresh: result was computed from the current inputs
+
+    def decisions_for(self, product_ids):
+        # Align (possibly stale) decisions with the current rows; unknown products get 0
+        if self.result is None:
+            return np.zeros(len(product_ids), dtype=int)
+        product_ids = list(product_ids)
+        if product_ids == self.product_ids:
+            return np.asarray(self.result.decisions, dtype=int)
+        lookup = pd.Series(self.result.decisions, index=self.product_ids)
+        lookup = lookup[~lookup.index.duplicated()]
+        return lookup.reindex(product_ids).fillna(0).astype(int).to_numpy()
+
+
+class SolverService:
+    """Runs CBC solves on a process pool and coalesces identical in-flight jobs."""
+
+    def __init__(self, max_workers=None, max_results=32):
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self._executor = None
+        self._lock = threading.RLock()  # done callbacks may fire while it is held
+        self._inflight = {}          # key -> (future, product_ids, {channels}, inputs)
+        self._done = OrderedDict()   # key -> (product_ids, result)
+        self._latest = {}            # channel -> key of last completed solve
+        self._deltas = {}            # (channel, big_m, force_skip_above) -> DeltaOptimizer
+        self._delta_waiting = {}     # same key -> job key the optimizer waits for
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @staticmethod
+    def job_key(product_ids, cost, stock, reorder_point, budget, capacity, big_m, force_skip_above):
+        h = hashlib.sha256()
+        h.update('\0'.join(map(str, product_ids)).encode())
+        for arr in (cost, stock, reorder_point):
+            h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+        h.update(repr((float(budget), float(capacity), float(big_m), bool(force_skip_above))).encode())
+        return h.hexdigest()
+
+    def request(self, df, settings, big_m=10000, force_skip_above=True, channel='default', wait=False):
+        product_ids = df['product_id'].tolist()
+        cost = df['reorder_cost'].to_numpy(dtype=float)
+        stock = df['stock'].to_numpy(dtype=float)
+        reorder_point = df['reorder_point'].to_numpy(dtype=float)
+        budget, capacity = settings['budget'], settings['warehouse_capacity']
+        key = self.job_key(product_ids, cost, stock, reorder_point, budget, capacity,
+                           big_m, force_skip_above)
+
+        model_key = (channel, float(big_m), bool(force_skip_above))
+        with self._lock:
+            if key in self._done:
+                self._done.move_to_end(key)
+                self._latest[channel] = key
+                ids, result = self._done[key]
+                return SolveStatus(result, ids, False, True)
+
+            # Closed-form instances, and edits that provably keep the previous optimum,
+            # are answered inline from the channel's delta optimizer; no process launch
+            delta = self._deltas.get(model_key)
+            if delta is None:
+                delta = self._deltas[model_key] = DeltaOptimizer(big_m=big_m, force_skip_above=force_skip_above)
+            result = delta.update(product_ids, cost, stock, reorder_point, budget, capacity, solve=False)
+            if result is not None:
+                self._delta_waiting.pop(model_key, None)
+                solve_path_counts[result.path] += 1
+                observe_solve(result)
+                self._store(key, product_ids, result, {channel})
+                return SolveStatus(result, product_ids, False, True)
+            self._delta_waiting[model_key] = key
+
+            if key in self._inflight:
+                future, _, channels, _ = self._inflight[key]
+                channels.add(channel)
+            else:
+                inputs = (cost, stock, reorder_point, budget, capacity)
+                future = self._pool().submit(_solve_job, product_ids, *inputs,
+                                             big_m, force_skip_above, model_key)
+                self._inflight[key] = (future, product_ids, {channel}, inputs)
+                future.add_done_callback(lambda f, k=key: self._finish(k, f))
+            previous = self._done.get(self._latest.get(channel))
+
+        # Nothing to show yet for this channel: block on the first solve
+        if previous is None or wait:
+            result = future.result()
+            return SolveStatus(result, product_ids, False, True)
+        ids, result = previous
+        return SolveStatus(result, ids, True, False)
+
+    def _finish(self, key, future):
+        with self._lock:
+            _, product_ids, channels, inputs = self._inflight.pop(key)
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            solve_path_counts[result.path] += 1
+            observe_solve(result)
+            self._store(key, product_ids, result, channels)
+            # The next small edit can then be checked against this optimum inline
+            for model_key, waiting in list(self._delta_waiting.items()):
+                if waiting == key:
+                    self._deltas[model_key].accept(product_ids, *inputs, result)
+                    del self._delta_waiting[model_key]
+
+    def _store(self, key, product_ids, result, channels):
+        self._done[key] = (product_ids, result)
+        self._done.move_to_end(key)
+        while len(self._done) > self.max_results:
+            self._done.popitem(last=False)
+        for channel in channels:
+            self._latest[channel] = key
+
+    def pending(self):
+        with self._lock:
+            return len(self._inflight)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_workers = os.getenv('SOLVER_WORKERS')
+solver_service = SolverService(max_workers=int(_workers) if _workers else None)
@@ -0,0 +1,17 @@
+// Submit only the rows that were edited: untouched rows are disabled just
+// before the POST so their fields are not sent.
+document.addEventListener('DOMContentLoaded', function () {
+    var form = document.getElementById('inventory-form');
+    if (!form) { return; }
+    form.addEventListener('submit', function () {
+        form.querySelectorAll('tr[data-row]').forEach(function (row) {
+            var inputs = row.querySelectorAll('input');
+            var changed = Array.prototype.some.call(inputs, function (input) {
+                return input.value !== input.defaultValue;
+            });
+            if (!changed) {
+                inputs.forEach(function (input) { input.disabled = true; });
+            }
+        });
+    });
+});
@@ -2,56 +2,68 @@
 # supply_chain_dashboard.py
 # --------------------------------------------------------------
 import os
+import sys
 import json
-from datetime import datetime
-from flask import Flask, render_template, redirect, url_for, session, request, flash
-from werkzeug.datastructures import MultiDict
-from flask_wtf import FlaskForm
-from wtforms import (StringField, PasswordField, FloatField,
-                     SubmitField, FormField)
-from wtforms.fields import FieldList
-from wtforms.validators import DataRequired, NumberRange
-from dash import Dash, dcc, html, Input, Output
-import plotly.express as px
-import pandas as pd
-import pulp
-from utils import load_data, load_settings, save_settings
+import time
+from flask import (Flask, Response, jsonify, render_template, redirect, url_for,
+                   session, request, flash, stream_with_context)
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+# Only light imports here: pandas, Plotly, Dash and PuLP load with the Dash app
+# (see dashboard_app.py), so login/logout/settings serve from a cold process fast
+from utils import (load_settings, save_settings, save_inventory_rows, data_version,
+                   inventory_store, file_cache, VersionConflict)
+from inventory_editor import (SAMPLE_ROW, page_args, load_page, form_data_for,
+                              submitted_rows, changed_rows, expected_versions)
+from renderer import image_renderer
+from forms import LoginForm, InventoryForm, SettingsForm
+from api import api_bp
+from lazy import LazyDash, prewarm, warm_kaleido
+import metrics
 
 # ------------------ Flask ------------------
 server = Flask(__name__, static_folder='static', static_url_path='/static')
 server.secret_key = os.getenv('SECRET_KEY', 'supersecretkey')
-
-# ------------------ Dash (shared) ------------------
-dash_app = Dash(__name__,
-                server=server,
-                url_base_pathname='/dash/',
-                assets_folder='static')
-
-# ------------------ Forms ------------------
-class LoginForm(FlaskForm):
-    username = StringField('Username', validators=[DataRequired()])
-    password = PasswordField('Password', validators=[DataRequired()])
-    submit   = SubmitField('Login')
-
-class InventoryItemForm(FlaskForm):
-    product_id      = StringField('Product ID', render_kw={'readonly': True})
-    product_name    = StringField('Product Name', validators=[DataRequired()])
-    item_description= StringField('Description', validators=[DataRequired()])
-    purpose         = StringField('Purpose', validators=[DataRequired()])
-    stock           = FloatField('Stock (000s)', validators=[DataRequired(), NumberRange(min=0)])
-    demand_rate     = FloatField('Demand Rate (000s/day)', validators=[DataRequired(), NumberRange(min=0)])
-    lead_time       = FloatField('Lead Time (days)', validators=[DataRequired(), NumberRange(min=0)])
-    reorder_cost    = FloatField('Reorder Cost (000s USD)', validators=[DataRequired(), NumberRange(min=0)])
-    safety_stock    = FloatField('Safety Stock (000s)', validators=[DataRequired(), NumberRange(min=0)])
-
-class InventoryForm(FlaskForm):
-    inventory = FieldList(FormField(InventoryItemForm), min_entries=0)
-    submit    = SubmitField('Update Inventory')
-
-class SettingsForm(FlaskForm):
-    budget            = FloatField('Budget (000s USD)', validators=[DataRequired(), NumberRange(min=0)])
-    warehouse_capacity= FloatField('Warehouse Capacity (000s units)', validators=[DataRequired(), NumberRange(min=0)])
-    submit            = SubmitField('Update Settings')
+# Route latency histograms, /metrics and PROFILE_REQUESTS=1 profiling
+metrics.init_app(server)
+
+# Bulk import/export API (/api/inventory, /api/decisions)
+server.register_blueprint(api_bp)
+
+# ------------------ Dash (mounted on first use) ------------------
+def create_dash():
+    from dashboard_app import create_dash_app
+    app = create_dash_app(requests_pathname_prefix='/dash/', routes_pathname_prefix='/')
+    metrics.init_app(app.server, endpoint=False)
+    return app
+
+dash_app = LazyDash(create_dash)
+server.wsgi_app = DispatcherMiddleware(server.wsgi_app, {'/dash': dash_app})
+
+# ------------------ Metrics from other components ------------------
+cache_requests = metrics.registry.counter('supplychain_cache_requests_total', 'Cache lookups by result.')
+renderer_gauge = metrics.registry.gauge('supplychain_renderer', 'Background PNG renderer state.')
+solve_paths = metrics.registry.counter('supplychain_solve_path_total', 'Solves answered per path.')
+solver_pending = metrics.registry.gauge('supplychain_solver_pending', 'CBC solves in flight.')
+
+@metrics.registry.collector
+def collect_component_metrics():
+    # Components that are not loaded yet have nothing to report
+    caches = [('file', file_cache)]
+    if 'service' in sys.modules:
+        service = sys.modules['service']
+        caches += [('result', service.result_cache), ('figure', service.figure_cache)]
+        if service.shared_cache is not None:
+            caches += [('shared', service.shared_cache), ('shared_figure', service.shared_figures)]
+    for name, cache in caches:
+        cache_requests.set(cache.hits, cache=name, result='hit')
+        cache_requests.set(cache.misses, cache=name, result='miss')
+    for key, value in image_renderer.metrics().items():
+        renderer_gauge.set(value, metric=key)
+    if 'optimizer' in sys.modules:
+        for path, count in sys.modules['optimizer'].solve_path_counts.items():
+            solve_paths.set(count, path=path)
+    if 'solver_service' in sys.modules:
+        solver_pending.set(sys.modules['solver_service'].solver_service.pending())
 
 # ------------------ Helpers ------------------
 def require_login(fn):
@@ -69,6 +81,7 @@ def require_role(role):
             if session.get('role') != role:
                 flash('You do not have permission for this page.', 'danger')
                 return redirect(url_for('dashboard'))
+            return fn(*args, **kwargs)
         wrapper.__name__ = fn.__name__
         return wrapper
     return decorator
@@ -103,51 +116,30 @@ def logout():
 @require_login
 @require_role('admin')
 def edit_inventory():
-    df = load_data() or pd.DataFrame(columns=[
-        'product_id','product_name','description','purpose',
-        'stock','demand_rate','lead_time','reorder_cost','safety_stock'
-    ])
-
-    # ---- pre-fill form ----
-    form_data = MultiDict()
-    for idx, row in df.iterrows():
-        prefix = f'inventory-{idx}'
-        for col in df.columns:
-            form_data.add(f'{prefix}-{col}', str(row[col]))
-    # add one blank row if empty
-    if df.empty:
-        prefix = 'inventory-0'
-        form_data.add(f'{prefix}-product_id', 'P001')
-        form_data.add(f'{prefix}-product_name', 'Sample Widget')
-        form_data.add(f'{prefix}-item_description', 'Example')
-        form_data.add(f'{prefix}-purpose', 'Demo')
-        form_data.add(f'{prefix}-stock', '100')
-        form_data.add(f'{prefix}-demand_rate', '10')
-        form_data.add(f'{prefix}-lead_time', '5')
-        form_data.add(f'{prefix}-reorder_cost', '50')
-        form_data.add(f'{prefix}-safety_stock', '20')
+    # One page of the catalog at a time; filtering/sorting run in the store
+    args = page_args(request.args)
+    page, total, pages = load_page(inventory_store, args)
+    rows = page.to_dict('records')
+    if not rows and not args['q']:
+        rows = [SAMPLE_ROW]  # one blank sample entry for an empty catalog
 
-    form = InventoryForm(formdata=form_data)
+    form = InventoryForm(formdata=request.form if request.method == 'POST' else form_data_for(rows))
 
     if request.method == 'POST' and form.validate_on_submit():
-        rows = []
-        for sub in form.inventory:
-            rows.append({
-                'product_id'      : sub.product_id.data,
-                'product_name'    : sub.product_name.data,
-                'description'     : sub.item_description.data,
-                'purpose'         : sub.purpose.data,
-                'stock'           : sub.stock.data,
-                'demand_rate'     : sub.demand_rate.data,
-                'lead_time'       : sub.lead_time.data,
-                'reorder_cost'    : sub.reorder_cost.data,
-                'safety_stock'    : sub.safety_stock.data,
-            })
-        pd.DataFrame(rows).to_csv('data/input/inventory_data.csv', index=False)
-        flash('Inventory saved!', 'success')
-        return redirect(url_for('edit_inventory'))
-
-    return render_template('edit_inventory.html', form=form)
+        # Only rows edited on this page are posted; upsert the ones that really differ
+        submitted = submitted_rows(form)
+        current = inventory_store.get_rows(r['product_id'] for r in submitted)
+        changed = changed_rows(submitted, current)
+        try:
+            save_inventory_rows(changed, expected_versions(form))
+            flash(f'Inventory saved! ({len(changed)} row(s) changed)', 'success')
+        except VersionConflict as exc:
+            # Nothing was saved; the reloaded page shows the other edit
+            flash(f'Not saved: {", ".join(exc.product_ids[:10])} changed since you loaded the page. '
+                  'Check the current values and edit again.', 'danger')
+        return redirect(url_for('edit_inventory', **request.args.to_dict()))
+
+    return render_template('edit_inventory.html', form=form, args=args, total=total, pages=pages)
 
 @server.route('/settings', methods=['GET', 'POST'])
 @require_login
@@ -157,9 +149,15 @@ def settings():
     form = SettingsForm(data=cur)
 
     if form.validate_on_submit():
-        save_settings({'budget': form.budget.data,
-                       'warehouse_capacity': form.warehouse_capacity.data})
-        flash('Settings updated!', 'success')
+        # Keep keys the form does not edit (warehouses, planning horizon, ...)
+        cur.update({'budget': form.budget.data,
+                    'warehouse_capacity': form.warehouse_capacity.data})
+        try:
+            save_settings(cur, expected_version=form.version.data or None)
+            flash('Settings updated!', 'success')
+        except (VersionConflict, ValueError):
+            flash('Not saved: the settings were changed since you loaded the page. '
+                  'Check the current values and save again.', 'danger')
         return redirect(url_for('settings'))
 
     return render_template('settings.html', form=form)
@@ -171,110 +169,59 @@ def dashboard():
     # Choose template according to role
     tmpl = 'dashboard_admin.html' if session.get('role') == 'admin' else 'dashboard_user.html'
     # Embed the Dash app (the same layout for both roles)
-    dash_html = dash_app.index_string.replace(
+    dash_html = dash_app.load().index_string.replace(
         '</head>', '<link rel="stylesheet" href="/static/style.css"></head>')
     # A tiny trick – inject the whole Dash HTML into the Flask template
     return render_template(tmpl, dash_embed=dash_html)
 
-# ------------------ DASH LAYOUT & CALLBACKS ------------------
-def build_figures():
-    df = load_data()
-    if df is None or df.empty:
-        empty = px.bar(title='No inventory data')
-        return empty, empty, pd.DataFrame()
-
-    # ---- Reorder point ----
-    df['reorder_point'] = df['demand_rate'] * df['lead_time'] + df['safety_stock']
-
-    # ---- Settings ----
-    settings = load_settings()
-
-    # ---- PuLP optimisation ----
-    prob = pulp.LpProblem("Reorder_Opt", pulp.LpMinimize)
-    reorder = pulp.LpVariable.dicts("reorder", df['product_id'], cat='Binary')
-
-    # objective = total reorder cost
-    prob += pulp.lpSum([reorder[p] * df.loc[df['product_id']==p, 'reorder_cost'].iloc[0]
-                        for p in df['product_id']])
+# ---------- CHANGE NOTIFICATIONS ----------
+# An event stream holds a server thread, so it ends after this many seconds and
+# the browser's EventSource reconnects after the retry delay
+EVENTS_MAX_SECONDS = int(os.getenv('EVENTS_MAX_SECONDS', '300'))
+EVENTS_RETRY_MS = 3000
 
-    # budget constraint
-    prob += pulp.lpSum([reorder[p] * df.loc[df['product_id']==p, 'reorder_cost'].iloc[0]
-                        for p in df['product_id']]) <= settings['budget']
-
-    # warehouse capacity (assume each reorder adds 50k units – change if you like)
-    prob += pulp.lpSum([reorder[p] * 50 for p in df['product_id']]) <= settings['warehouse_capacity']
-
-    # force reorder when stock < reorder_point
-    M = 1_000_000
-    for p in df['product_id']:
-        stock = df.loc[df['product_id']==p, 'stock'].iloc[0]
-        rp    = df.loc[df['product_id']==p, 'reorder_point'].iloc[0]
-        prob += reorder[p] >= (rp - stock) / M
-        prob += reorder[p] <= 1
-
-    status = prob.solve(pulp.PULP_CBC_CMD(msg=False))
-    if status == 1:
-        df['should_reorder'] = [int(reorder[p].value()) for p in df['product_id']]
-    else:
-        df['should_reorder'] = 0
-
-    # ---- Figures ----
-    fig1 = px.bar(df, x='product_id', y='stock',
-                  color='should_reorder',
-                  title='Stock Levels (red = reorder recommended)',
-                  color_continuous_scale='Viridis')
-    fig1.add_hline(y=df['reorder_point'].mean(),
-                   line_dash="dash", line_color="red",
-                   annotation_text="Avg Reorder Point")
-
-    fig1.update_traces(
-        hovertemplate=(
-            '<b>%{x}</b><br>'
-            'Name: %{customdata[0]}<br>'
-            'Desc: %{customdata[1]}<br>'
-            'Purpose: %{customdata[2]}<br>'
-            'Stock: %{y}k<br>'
-            'Demand: %{customdata[3]}k/day<br>'
-            'Lead: %{customdata[4]} days<br>'
-            'Safety: %{customdata[5]}k'
-        ),
-        customdata=df[['product_name','description','purpose',
-                       'demand_rate','lead_time','safety_stock']]
-    )
-
-    fig2 = px.bar(df, x='product_id', y='reorder_cost',
-                  title='Reorder Cost per Product',
-                  color='should_reorder',
-                  color_continuous_scale='Plasma')
-
-    # ---- Save static images (optional) ----
-    today = datetime.now().strftime('%Y-%m-%d')
-    out = f'data/images/outputdashboards/{today}'
-    os.makedirs(out, exist_ok=True)
-    fig1.write_image(f'{out}/inventory_dashboard.png')
-    fig2.write_image(f'{out}/cost-to-reorder.png')
-    df.to_csv('data/output/inventory_dashboard.csv', index=False)
-
-    return fig1, fig2, df
-
-# Dash layout (same for admin & user)
-dash_app.layout = html.Div([
-    html.H2('Supply-Chain Overview', style={'textAlign':'center'}),
-    dcc.Graph(id='graph-stock'),
-    dcc.Graph(id='graph-cost'),
-    dcc.Interval(id='interval', interval=30*1000, n_intervals=0)  # refresh every 30s
-])
+@server.route('/api/version')
+@require_login
+def api_version():
+    # Clients poll this (or subscribe to /api/events) and refetch only when it changes
+    resp = jsonify(version=data_version())
+    resp.set_etag(resp.json['version'])
+    return resp.make_conditional(request)
 
-@dash_app.callback(
-    [Output('graph-stock', 'figure'),
-     Output('graph-cost', 'figure')],
-    Input('interval', 'n_intervals')
-)
-def refresh_graphs(_):
-    f1, f2, _ = build_figures()
-    return f1, f2
+@server.route('/api/events')
+@require_login
+def api_events():
+    # Server-sent events: one 'version' event per change, comment keep-alives in between
+    def stream():
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        last, idle = None, 0
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            version = data_version()
+            if version != last:
+                last, idle = version, 0
+                yield f'event: version\ndata: {version}\n\n'
+            elif idle >= 15:
+                idle = 0
+                yield ': keep-alive\n\n'
+            idle += 1
+            time.sleep(1)
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ------------------ Optional pre-warm ------------------
+def warm_dashboard():
+    dash_app.load()
+    sys.modules['service'].build_results()
+
+# PREWARM=1 loads Dash, computes the current results and starts Kaleido in the
+# background, so the first dashboard view is not the one paying for it
+if os.getenv('PREWARM', '0') == '1':
+    prewarm(warm_dashboard, warm_kaleido)
 
 # --------------------------------------------------------------
 if __name__ == '__main__':
-    # Flask debug + Dash auto-reload
-    server.run(host='0.0.0.0', port=8050, debug=True, use_reloader=True)
\ No newline at end of file
+    # Development server (Flask debug + auto-reload; DEBUG=0 to turn off).
+    # Production: gunicorn wsgi:application, see wsgi.py
+    debug = os.getenv('DEBUG', '1') == '1'
+    server.run(host='0.0.0.0', port=int(os.getenv('PORT', '8050')), debug=debug, use_reloader=debug)
\ No newline at end of file
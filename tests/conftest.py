@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import utils  # noqa: E402
+from cache import StatCache  # noqa: E402
+from inventory_store import InventoryStore  # noqa: E402
+
+CSV = """product_id,product_name,description,purpose,stock,demand_rate,lead_time,reorder_cost,safety_stock
+P1,AI Chip X,High-performance AI processor,Data center computing,50,10,3,100,10
+P2,Sensor Module Y,Precision temperature sensor,Robotics automation,20,5,2,80,5
+P3,Battery Pack Z,Long-life battery,Electric vehicles,5,8,4,60,6
+"""
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # A fresh store next to a CSV it has never imported, wired into utils
+    csv_path = tmp_path / 'inventory_data.csv'
+    csv_path.write_text(CSV)
+    store = InventoryStore(str(tmp_path / 'inventory.db'), csv_path=str(csv_path))
+    monkeypatch.setattr(utils, 'inventory_store', store)
+    monkeypatch.setattr(utils, 'DATA_PATH', str(csv_path))
+    monkeypatch.setattr(utils, 'file_cache', StatCache())
+    return store
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import api  # noqa: E402
+import utils  # noqa: E402
+
+NDJSON = ('{"product_id": "P2", "product_name": "Sensor Module Y", "description": "Precision temperature sensor", '
+          '"purpose": "Robotics automation", "stock": 77, "demand_rate": 5, "lead_time": 2, '
+          '"reorder_cost": 80, "safety_stock": 5}\n'
+          '{"product_id": "P9", "product_name": "Gear", "description": "Spare gear", "purpose": "Demo", '
+          '"stock": 3, "demand_rate": 1, "lead_time": 1, "reorder_cost": 9, "safety_stock": 0}\n')
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(api, 'inventory_store', store)
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(api.api_bp)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+        sess['role'] = 'admin'
+    return client
+
+
+def test_import_into_fresh_store_keeps_csv_rows(client):
+    resp = client.post('/api/inventory', data=NDJSON, content_type='application/x-ndjson')
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()['received'] == 2
+    df = utils.load_data().set_index('product_id')
+    assert df.index.tolist() == ['P1', 'P2', 'P3', 'P9']
+    assert df.loc['P2', 'stock'] == 77.0
+    assert df.loc['P9', 'reorder_cost'] == 9.0
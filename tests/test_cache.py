@@ -0,0 +1,33 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import atomicfile  # noqa: E402
+from cache import SharedCache  # noqa: E402
+
+
+@pytest.mark.parametrize('has_fcntl', [True, False])
+def test_shared_cache_lock_serialises_threads(tmp_path, monkeypatch, has_fcntl):
+    if not has_fcntl:
+        monkeypatch.setattr(atomicfile, 'fcntl', None)
+    cache = SharedCache(str(tmp_path / 'shared.db'))
+    inside, overlaps = [], []
+
+    def work():
+        with cache.lock('key'):
+            inside.append(1)
+            overlaps.append(len(inside))
+            time.sleep(0.01)
+            inside.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == [1, 1, 1, 1]
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from figures import GROUP_COLUMNS, view_figures  # noqa: E402
+from ingest import DASHBOARD_COLUMNS  # noqa: E402
+
+
+def _results():
+    return pd.DataFrame({
+        'product_id': ['P1', 'P2', 'P3'], 'purpose': ['Robotics', 'Robotics', 'Vehicles'],
+        'stock': [50.0, 20.0, 5.0], 'reorder_point': [30.0, 10.0, 40.0],
+        'reorder_cost': [100.0, 80.0, 60.0], 'should_reorder': [0, 0, 1],
+        'reorder_gap': [-20.0, -10.0, 35.0],
+    })
+
+
+def test_group_columns_are_loaded_for_the_dashboard():
+    assert set(GROUP_COLUMNS) <= set(DASHBOARD_COLUMNS)
+
+
+def test_every_grouping_draws_its_summary():
+    for group_by in GROUP_COLUMNS:
+        fig1, _, view = view_figures(_results(), 'summary', group_by)
+        assert view == 'summary'
+        assert sorted(fig1.data[0].x) == ['Robotics', 'Vehicles']
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import utils  # noqa: E402
+from inventory_editor import load_page, page_args  # noqa: E402
+
+
+def test_editor_sees_csv_rows_on_fresh_store(store):
+    page, total, _ = load_page(store, page_args({}))
+    assert total == 3
+    assert page['product_id'].tolist() == ['P1', 'P2', 'P3']
+
+
+def test_edit_survives_load_data(store):
+    page, _, _ = load_page(store, page_args({}))
+    row = page.iloc[1].to_dict()
+    expected = {row['product_id']: int(row.pop('row_version'))}
+    row['stock'] = 99.0
+    assert utils.save_inventory_rows([row], expected) == 1
+    df = utils.load_data()
+    assert len(df) == 3
+    assert df.set_index('product_id').loc['P2', 'stock'] == 99.0
+
+
+def test_write_before_any_read_keeps_csv_rows(store):
+    # The first thing the store sees is a save: the CSV is imported underneath it
+    new = {'product_id': 'P4', 'product_name': 'Widget', 'description': 'New', 'purpose': 'Demo',
+           'stock': 1.0, 'demand_rate': 1.0, 'lead_time': 1.0, 'reorder_cost': 1.0, 'safety_stock': 0.0}
+    utils.save_inventory_rows([new], {'P4': None})
+    df = utils.load_data()
+    assert df['product_id'].tolist() == ['P1', 'P2', 'P3', 'P4']
@@ -0,0 +1,169 @@
+import os
+import sys
+
+import numpy as np
+import pulp
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from optimizer import (UNITS_PER_ORDER, DeltaOptimizer, closed_form_reorders, optimize_reorders,  # noqa: E402
+                       solve_cbc)
+
+BIG_M = 10000
+
+
+def random_inventory(rng, n, zero_cost=0.0, negative_cost=0.0):
+    cost = rng.uniform(10, 200, n).round(1)
+    cost[rng.random(n) < zero_cost] = 0
+    cost[rng.random(n) < negative_cost] *= -1
+    stock = rng.uniform(0, 100, n).round(1)
+    reorder_point = rng.uniform(0, 100, n).round(1)
+    return cost, stock, reorder_point
+
+
+def assert_feasible(decisions, cost, stock, reorder_point, budget, capacity):
+    assert cost @ decisions <= budget + 1e-6
+    assert UNITS_PER_ORDER * decisions.sum() <= capacity + 1e-6
+    assert (decisions[reorder_point > stock] == 1).all()
+
+
+def assert_same_answer(fast, cbc, cost):
+    # Ties between zero-cost products may be broken either way: compare the objective
+    assert fast.status == cbc.status
+    if cbc.status == pulp.LpStatusOptimal:
+        assert cost @ fast.decisions == pytest.approx(cost @ cbc.decisions)
+        priced = cost != 0
+        assert (fast.decisions[priced] == cbc.decisions[priced]).all()
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('zero_cost', [0.0, 0.3])
+def test_closed_form_matches_cbc(seed, zero_cost):
+    rng = np.random.default_rng(seed)
+    cost, stock, reorder_point = random_inventory(rng, 40, zero_cost=zero_cost)
+    forced = reorder_point > stock
+    budget = cost[forced].sum() + 100
+    capacity = UNITS_PER_ORDER * (forced.sum() + 2)
+    fast = closed_form_reorders(cost, stock, reorder_point, budget, capacity, big_m=BIG_M)
+    cbc = solve_cbc(cost, stock, reorder_point, budget, capacity, big_m=BIG_M)
+    assert fast.status == pulp.LpStatusOptimal
+    assert_feasible(fast.decisions, cost, stock, reorder_point, budget, capacity)
+    assert_same_answer(fast, cbc, cost)
+
+
+@pytest.mark.parametrize('bound', ['budget', 'capacity'])
+def test_closed_form_infeasible_when_forced_set_does_not_fit(bound):
+    rng = np.random.default_rng(7)
+    cost, stock, reorder_point = random_inventory(rng, 30)
+    forced = reorder_point > stock
+    budget = cost[forced].sum() + 100
+    capacity = UNITS_PER_ORDER * (forced.sum() + 2)
+    if bound == 'budget':
+        budget = cost[forced].sum() - 1
+    else:
+        capacity = UNITS_PER_ORDER * forced.sum() - 1
+    fast = closed_form_reorders(cost, stock, reorder_point, budget, capacity, big_m=BIG_M)
+    cbc = solve_cbc(cost, stock, reorder_point, budget, capacity, big_m=BIG_M)
+    assert fast.status == cbc.status == pulp.LpStatusInfeasible
+
+
+@pytest.mark.parametrize('force_skip_above', [True, False])
+def test_closed_form_follows_skip_rows(force_skip_above):
+    cost = np.array([1.0, 2.0])
+    stock = np.array([5.0, BIG_M * 3])
+    reorder_point = np.array([10.0, 10.0])
+    args = (cost, stock, reorder_point, 100, 1000)
+    fast = closed_form_reorders(*args, big_m=BIG_M, force_skip_above=force_skip_above)
+    cbc = solve_cbc(*args, big_m=BIG_M, force_skip_above=force_skip_above)
+    assert_same_answer(fast, cbc, cost)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_negative_costs_fall_back_to_cbc(seed):
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    cost, stock, reorder_point = random_inventory(rng, 30, negative_cost=0.2)
+    assert closed_form_reorders(cost, stock, reorder_point, 1e6, 1e6, big_m=BIG_M) is None
+    df = pd.DataFrame({'reorder_cost': cost, 'stock': stock, 'reorder_point': reorder_point})
+    forced = reorder_point > stock
+    # x <= 1 - (stock - reorder_point - 1)/big_m keeps products well above their reorder point at 0
+    skipped = stock - reorder_point - 1 > 0
+    settings = {'budget': cost[forced].sum() + 50, 'warehouse_capacity': UNITS_PER_ORDER * len(cost)}
+    fast = optimize_reorders(df, settings, big_m=BIG_M)
+    slow = optimize_reorders(df, settings, big_m=BIG_M, fast_path=False)
+    assert fast.status == pulp.LpStatusOptimal
+    assert fast.path == slow.path == 'cbc'
+    assert_same_answer(fast, slow, cost)
+    # Negative-cost products are worth ordering unless their skip row forbids it
+    assert (fast.decisions[(cost < 0) & ~skipped] == 1).all()
+    assert (fast.decisions[skipped] == 0).all()
+
+
+# ---- delta re-optimisation ----
+def _edit(rng, cost, stock, reorder_point, rows):
+    cost, stock, reorder_point = cost.copy(), stock.copy(), reorder_point.copy()
+    stock[rows] = rng.uniform(0, 100, len(rows)).round(1)
+    cost[rows] = np.where(rng.random(len(rows)) < 0.2, -1, 1) * rng.uniform(0, 200, len(rows)).round(1)
+    reorder_point[rows] = rng.uniform(0, 100, len(rows)).round(1)
+    return cost, stock, reorder_point
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('negative_cost', [0.0, 0.2])
+def test_delta_matches_full_solve_after_edits(seed, negative_cost):
+    rng = np.random.default_rng(seed)
+    n = 40
+    ids = [f'P{i}' for i in range(n)]
+    cost, stock, reorder_point = random_inventory(rng, n, zero_cost=0.1, negative_cost=negative_cost)
+    delta = DeltaOptimizer(big_m=BIG_M)
+    paths = set()
+    for step in range(8):
+        forced = reorder_point > stock
+        # Alternate between loose limits and ones that bind on budget or capacity
+        budget = cost[forced].sum() + (500 if step % 3 else rng.uniform(-50, 50))
+        capacity = UNITS_PER_ORDER * (forced.sum() + (5 if step % 2 else rng.integers(-1, 2)))
+        result = delta.update(ids, cost, stock, reorder_point, budget, capacity)
+        full = solve_cbc(cost, stock, reorder_point, budget, capacity, big_m=BIG_M)
+        paths.add(result.path)
+        assert result.status == full.status, (step, result.path)
+        if full.status == pulp.LpStatusOptimal:
+            assert_feasible(result.decisions, cost, stock, reorder_point, budget, capacity)
+            assert cost @ result.decisions == pytest.approx(cost @ full.decisions), (step, result.path)
+        cost, stock, reorder_point = _edit(rng, cost, stock, reorder_point, rng.choice(n, 3, replace=False))
+    if negative_cost:
+        assert 'cbc' in paths
+
+
+def test_delta_reuses_solution_for_unchanged_inputs():
+    rng = np.random.default_rng(11)
+    cost, stock, reorder_point = random_inventory(rng, 20, negative_cost=0.3)
+    ids = [f'P{i}' for i in range(20)]
+    delta = DeltaOptimizer(big_m=BIG_M)
+    first = delta.update(ids, cost, stock, reorder_point, 1e5, 1e5)
+    assert delta.update(ids, cost, stock, reorder_point, 1e5, 1e5) is first
+    # A dearer product that was not ordered stays unordered: no CBC run needed
+    edited = cost.copy()
+    idle = np.flatnonzero((first.decisions == 0) & (cost >= 0))[0]
+    edited[idle] += 10
+    again = delta.update(ids, edited, stock, reorder_point, 1e5, 1e5)
+    assert again.path == 'delta'
+    full = solve_cbc(edited, stock, reorder_point, 1e5, 1e5, big_m=BIG_M)
+    assert edited @ again.decisions == pytest.approx(edited @ full.decisions)
+
+
+def test_scenarios_default_to_the_dashboard_model():
+    # A sweep point at the current settings must give the dashboard's answer
+    import pandas as pd
+    from scenarios import run_scenarios
+    from service import BIG_M as SERVICE_BIG_M, FORCE_SKIP_ABOVE as SERVICE_SKIP
+    rng = np.random.default_rng(3)
+    cost, stock, reorder_point = random_inventory(rng, 20)
+    # Far above their reorder point: only a skip row would stop these being ordered
+    stock[:3] = SERVICE_BIG_M / 100 * 3
+    df = pd.DataFrame({'reorder_cost': cost, 'stock': stock, 'reorder_point': reorder_point})
+    budget, capacity = 1e5, 1e5
+    row = run_scenarios(df, [budget], [capacity], workers=1).iloc[0]
+    dashboard = solve_cbc(cost, stock, reorder_point, budget, capacity,
+                          big_m=SERVICE_BIG_M, force_skip_above=SERVICE_SKIP)
+    assert row['total_cost'] == pytest.approx(cost @ dashboard.decisions)
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import replenishment  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_model(monkeypatch):
+    monkeypatch.setattr(replenishment, '_model', None)
+
+
+def _catalog():
+    return pd.DataFrame({'product_id': ['P1'], 'stock': [0.0], 'demand_rate': [10.0], 'lead_time': [0.0],
+                         'reorder_cost': [1.0], 'safety_stock': [0.0]})
+
+
+def _settings(max_order_qty):
+    return {'budget': 1000, 'warehouse_capacity': 1000, 'horizon_days': 1, 'max_order_qty': max_order_qty}
+
+
+def test_cached_model_follows_max_order_qty():
+    # Demand of 10 with orders capped at 5: the cached model must apply the new cap
+    df = _catalog()
+    first = replenishment.plan_replenishment(df, _settings(50))
+    assert first.plan['quantity'].max() >= 10
+
+    cached = replenishment.plan_replenishment(df, _settings(5))
+    replenishment._model = None
+    fresh = replenishment.plan_replenishment(df, _settings(5))
+    assert cached.plan['quantity'].max() == pytest.approx(5)
+    assert cached.objective == pytest.approx(fresh.objective)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import utils  # noqa: E402
+
+
+def _frame():
+    return pd.DataFrame({'product_id': ['P1', 'P2'], 'stock': [1.0, 2.0]})
+
+
+def test_apply_rows_leaves_cached_frame_alone():
+    # Without copy-on-write (importing ingest must not switch it on) the original stays as it was
+    import ingest  # noqa: F401
+    assert pd.get_option('mode.copy_on_write') is not True
+    cached = _frame()
+    edited = utils.apply_rows(cached, pd.DataFrame({'product_id': ['P1', 'P3'], 'stock': [5.0, 7.0]}))
+    assert cached['stock'].tolist() == [1.0, 2.0]
+    assert edited['stock'].tolist() == [5.0, 2.0, 7.0]
+
+
+def test_copies_are_independent_with_and_without_copy_on_write():
+    for cow in (False, True):
+        with pd.option_context('mode.copy_on_write', cow):
+            cached = _frame()
+            copy = utils._copy(cached)
+            copy.loc[0, 'stock'] = 99.0
+            assert cached.loc[0, 'stock'] == 1.0
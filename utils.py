@@ -1,26 +1,135 @@
 # utils.py
-import pandas as pd, json, os
+import json, os
+from inventory_store import InventoryStore, VersionConflict
+from cache import StatCache, stat_signature
+from atomicfile import atomic_write, file_lock
 
 DATA_PATH = 'data/input/inventory_data.csv'
+STORE_PATH = 'data/input/inventory.db'
 SETTINGS_PATH = 'data/settings.json'
+DEMAND_HISTORY_PATH = os.getenv('DEMAND_HISTORY_PATH', 'data/input/demand_history.csv')
 
-def load_data():
-    if not os.path.exists(DATA_PATH):
-        return None
-    return pd.read_csv(DATA_PATH)
+# The SQLite store is the source of truth; the CSV is imported whenever it changes on disk
+inventory_store = InventoryStore(STORE_PATH, csv_path=DATA_PATH)
 
-def load_settings():
-    if not os.path.exists(SETTINGS_PATH):
-        default = {"budget": 1000, "warehouse_capacity": 1000}
-        save_settings(default)
-        return default
+# Parsed inventory/settings, reparsed only when a file's mtime or size changes
+file_cache = StatCache()
+
+def _read_inventory(columns=None):
+    # (store version, frame); the version is read first, so a concurrent write
+    # is at worst applied twice by the next refresh
+    inventory_store.sync_from_csv()
+    version = inventory_store.version()
+    if inventory_store.count() == 0:
+        return version, None
+    return version, inventory_store.load_frame(columns)
+
+def _refresh_inventory(entry, columns=None):
+    # After an edit only the changed rows are read and patched into a copy of the
+    # cached frame; deletes, re-imports and large edits fall back to a full read
+    version, df = entry
+    inventory_store.sync_from_csv()
+    changes = None if df is None else inventory_store.changes_since(version, columns)
+    if changes is None:
+        return _read_inventory(columns)
+    rows, current = changes
+    if not rows.empty:
+        df = apply_rows(df, rows)
+    return current, df
+
+def apply_rows(df, rows):
+    # Upserts rows (same columns as df) by product_id; new products go last, as in the store
+    import pandas as pd
+    from ingest import concat_chunks
+    pos = pd.Index(df['product_id']).get_indexer(rows['product_id'])
+    known = pos >= 0
+    df = _copy(df)
+    for col in rows.columns.drop('product_id'):
+        values = rows[col][known]
+        if df[col].dtype == 'category':
+            missing = set(values.dropna()) - set(df[col].cat.categories)
+            if missing:
+                df[col] = df[col].cat.add_categories(sorted(missing))
+        df.iloc[pos[known], df.columns.get_loc(col)] = values.to_numpy()
+    if not known.all():
+        df = concat_chunks([df, rows[~known]])
+    return df
+
+def load_data(columns=None):
+    # columns limits what is read from the store (see ingest.DASHBOARD_COLUMNS)
+    key = ('inventory', tuple(columns) if columns else None)
+    _, df = file_cache.get(key, (DATA_PATH,), lambda: _read_inventory(columns),
+                           refresh=lambda entry: _refresh_inventory(entry, columns),
+                           token=inventory_version())
+    return None if df is None else _copy(df)
+
+def _copy(df):
+    # Cached frames are never handed out as-is. With pandas copy-on-write on
+    # (the dashboards enable it at start-up) a shallow copy is enough: only
+    # columns a caller writes get copied. Otherwise copy the data.
+    import pandas as pd
+    return df.copy(deep=pd.get_option('mode.copy_on_write') is not True)
+
+def describe_products(product_ids):
+    # Text columns for just the given products, to decorate small views
+    return inventory_store.get_rows(product_ids)[['product_id', 'product_name', 'description']]
+
+def save_inventory_rows(rows, expected=None):
+    # expected: product_id -> row_version read by the editor (see InventoryStore.upsert_rows)
+    return inventory_store.upsert_rows(rows, expected)
+
+def load_forecast():
+    # Demand state from the daily history (None without one); days appended to
+    # the CSV are folded into the kept state instead of refitting everything
+    from forecast import extend_history, fit_history
+    return file_cache.get('forecast', (DEMAND_HISTORY_PATH,), lambda: fit_history(DEMAND_HISTORY_PATH),
+                          refresh=lambda state: extend_history(state, DEMAND_HISTORY_PATH))
+
+def inventory_version():
+    # The store's own version: in WAL mode commits do not touch the database
+    # file, so its mtime says nothing. The CSV is re-imported when it changes.
+    file_cache.get('inventory_csv', (DATA_PATH,), inventory_store.sync_from_csv)
+    return inventory_store.version_token()
+
+def settings_version():
+    return load_settings()['version']
+
+def demand_version():
+    sig = stat_signature(DEMAND_HISTORY_PATH)
+    return f'{sig[0]}-{sig[1]}' if sig else '0'
+
+def data_version():
+    # Changes whenever inventory, settings or demand history change; cheap enough to poll
+    return f'{inventory_version()}/{settings_version()}/{demand_version()}'
+
+def _read_settings():
     with open(SETTINGS_PATH) as f:
         s = json.load(f)
     s.setdefault('budget', 1000)
     s.setdefault('warehouse_capacity', 1000)
+    s.setdefault('version', 0)
     return s
 
-def save_settings(settings):
-    os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
-    with open(SETTINGS_PATH, 'w') as f:
-        json.dump(settings, f, indent=2)
\ No newline at end of file
+def load_settings():
+    # Includes 'version', bumped by every save that changes something
+    if not os.path.exists(SETTINGS_PATH):
+        save_settings({"budget": 1000, "warehouse_capacity": 1000})
+    return dict(file_cache.get('settings', (SETTINGS_PATH,), _read_settings))
+
+def save_settings(settings, expected_version=None):
+    # Compare-and-swap: with expected_version (the 'version' the caller loaded), a
+    # newer file raises VersionConflict instead of being overwritten. Saving what is
+    # already stored writes nothing. Returns the stored version.
+    with file_lock(SETTINGS_PATH):
+        current = _read_settings() if os.path.exists(SETTINGS_PATH) else None
+        version = current['version'] if current else 0
+        if expected_version is not None and int(expected_version) != version:
+            raise VersionConflict(f'settings are at version {version}, not {expected_version}',
+                                  current=version)
+        new = {k: v for k, v in settings.items() if k != 'version'}
+        if current and new == {k: v for k, v in current.items() if k != 'version'}:
+            return version
+        new['version'] = version + 1
+        with atomic_write(SETTINGS_PATH) as f:
+            json.dump(new, f, indent=2)
+    return new['version']
\ No newline at end of file
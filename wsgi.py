@@ -0,0 +1,28 @@
+# wsgi.py
+# Production entry point for multi-worker WSGI servers:
+#   gunicorn wsgi:application        # the dashboard (supply_chain_dashboard.py)
+#   gunicorn wsgi:editor             # the simple editor (app.py)
+# gunicorn.conf.py sets one worker process per core. Workers share solved
+# results and figures through SHARED_CACHE_PATH, and only one of them
+# computes a given inventory/settings version (see service.shared).
+import logging
+import os
+
+# Defaults for every worker, before the apps read their configuration
+os.environ.setdefault('SHARED_CACHE_PATH', 'data/cache/shared.db')
+# One CBC process per web worker: the workers already use every core
+os.environ.setdefault('SOLVER_WORKERS', '1')
+os.makedirs(os.path.dirname(os.environ['SHARED_CACHE_PATH']) or '.', exist_ok=True)
+
+if 'SECRET_KEY' not in os.environ:
+    logging.getLogger(__name__).warning('SECRET_KEY is not set; sessions use the built-in sample key')
+
+from supply_chain_dashboard import server as application  # noqa: E402
+
+
+def __getattr__(name):
+    # wsgi:editor, imported only when asked for
+    if name == 'editor':
+        from app import server
+        return server
+    raise AttributeError(name)